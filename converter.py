@@ -1,53 +1,202 @@
 import os
+import sys
+import json
+import hashlib
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+
+from src.experiment import load_matrix
+
 video_path = Path('./videos/Original/4k.mp4')
 #video_path = Path('sse-group22/Original/4k.mp4')
 output_folder = Path('./videos/converted/')
 codecs = ['H.264', 'H.265']
-resolutions = [2160]#[2160, 1080, 720, 480]
-
-def convert_videos():
-    for codec in codecs:
-        for res in resolutions:
-            decode(res, codec, video_path, output_folder)
+resolutions = [2160, 1080, 720, 480]
 
+CODECS = {
+    'H.264': 'libx264',
+    'H.265': 'libx265',
+}
+SCALES = {
+    2160: '2560:1440',
+    1080: '1920:1080',
+    720: '1280:720',
+    480: '854:480',
+}
+PRESET = 'medium'
+CRF = '23'
+# Rough upper bound of the memory one encoder of a 4K source needs
+ENCODER_MEMORY = 1.5 * 1024 ** 3
+# Encoders fed by one decode of the source
+ENCODERS_PER_JOB = 4
+MANIFEST = 'manifest.json'
 
-def decode(res: int, codec: str, video: Path, output: Path):
-    os.makedirs(output, exist_ok=True)
-    output = output / f'{res}p_{codec}.mp4'
-    if output.exists():
-        return
 
-    if codec == 'H.264':
-        cv = 'libx264'
-    elif codec == 'H.265':
-        cv = 'libx265'
-    else:
+def encode_params(res: int, codec: str):
+    if codec not in CODECS:
         raise ValueError(f'Unknown codec: {codec}')
-
-    if res == 2160:
-        r = '2560:1440'
-    elif res == 1080:
-        r = '1920:1080'
-    elif res == 720:
-        r = '1280:720'
-    elif res == 480:
-        r = '854:480'
-    else:
+    if res not in SCALES:
         raise ValueError(f'Unknown resolution: {res}')
+    return ['-c:v', CODECS[codec], '-preset', PRESET, '-crf', CRF]
+
+
+def output_name(res: int, codec: str):
+    return f'{res}p_{codec}.mp4'
+
+
+def available_memory():
+    """Available physical memory in bytes, or None if it cannot be determined."""
+    if sys.platform == 'win32':
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                        ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                        ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                        ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                        ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+        return status.ullAvailPhys
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def max_encoders():
+    """Number of encoders that can run at the same time on this machine."""
+    # The encoders are multithreaded themselves, so two cores per encoder keeps them busy
+    limit = max(1, (os.cpu_count() or 1) // 2)
+    memory = available_memory()
+    if memory is not None:
+        limit = min(limit, max(1, int(memory // ENCODER_MEMORY)))
+    return limit
+
+
+def file_hash(path: Path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Manifest:
+    """Records the source hash and encode parameters of every converted video in the output folder."""
+
+    def __init__(self, output: Path):
+        self.path = output / MANIFEST
+        self.data = {'source': {}, 'outputs': {}}
+        # Only a new manifest adopts the videos that are already there
+        self.created = not self.path.exists()
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+
+    def source_hash(self, video: Path):
+        # Hashing a 4K master takes a while, so the hash is reused while its size and mtime are unchanged
+        stat = video.stat()
+        source = self.data['source'].get(str(video.absolute()))
+        if source is None or source['size'] != stat.st_size or source['mtime'] != stat.st_mtime:
+            source = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': file_hash(video)}
+            self.data['source'][str(video.absolute())] = source
+        return source['hash']
+
+    def entry(self, source_hash, res: int, codec: str):
+        return {'source': source_hash, 'scale': SCALES[res], 'params': encode_params(res, codec)}
+
+    def is_current(self, output: Path, entry):
+        if self.created and output.exists() and output.name not in self.data['outputs']:
+            # Videos converted before there was a manifest are assumed to be up to date
+            self.record(output, entry)
+        return output.exists() and self.data['outputs'].get(output.name) == entry
+
+    def record(self, output: Path, entry):
+        self.data['outputs'][output.name] = entry
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.data, f, indent=4)
+
+
+def part_path(output: Path):
+    return output.with_name(output.name + '.part')
+
+
+def tee_command(video: Path, targets):
+    """One ffmpeg command that decodes the video once and feeds every (res, codec, output) target.
+
+    The videos are written to <output>.part, so an interrupted conversion never leaves a complete-looking output.
+    """
+    split = f'[0:v]split={len(targets)}' + ''.join(f'[s{i}]' for i in range(len(targets)))
+    scales = [f'[s{i}]scale={SCALES[res]}[v{i}]' for i, (res, _, _) in enumerate(targets)]
+    command = ['ffmpeg', '-y', '-i', str(video.absolute()), '-filter_complex', ';'.join([split] + scales)]
+    for i, (res, codec, output) in enumerate(targets):
+        command += ['-map', f'[v{i}]', '-map', '0:a?'] + encode_params(res, codec) + ['-c:a', 'aac', '-f', 'mp4',
+                                                                                  str(part_path(output).absolute())]
+    return command
+
+
+def run_job(video: Path, targets):
+    names = ', '.join(output.name for _, _, output in targets)
+    print(f'Converting {video.name} to {names}')
+    result = subprocess.run(tee_command(video, targets))
+    for _, _, output in targets:
+        if result.returncode == 0:
+            os.replace(part_path(output), output)
+        elif part_path(output).exists():
+            os.remove(part_path(output))
+    if result.returncode != 0:
+        raise RuntimeError(f'ffmpeg failed with exit code {result.returncode} for {names}')
+    return targets
+
+
+def conversion_targets():
+    """The (resolution, codec) videos the experiment matrix needs, or all combinations of the lists above."""
+    matrix = load_matrix()
+    if matrix is not None and matrix.inputs():
+        return matrix.inputs()
+    return [(res, codec) for codec in codecs for res in resolutions]
+
+
+def convert_videos(video: Path = video_path, output: Path = output_folder):
+    os.makedirs(output, exist_ok=True)
+    manifest = Manifest(output)
+    source_hash = manifest.source_hash(video)
+
+    todo = []
+    for res, codec in conversion_targets():
+        target = output / output_name(res, codec)
+        if not manifest.is_current(target, manifest.entry(source_hash, res, codec)):
+            todo.append((res, codec, target))
+    manifest.save()
+    if not todo:
+        print('All videos are up to date.')
+        return
 
-    decoder_command = [
-        'ffmpeg',
-        '-i', str(video.absolute()),
-        '-c:v', cv,
-        '-preset', 'medium',
-        '-crf', '23',
-        '-vf', f'scale={r}',
-        str(output.absolute()),
-    ]
-    subprocess.Popen(decoder_command, shell=True).wait()
+    encoders = max_encoders()
+    per_job = min(ENCODERS_PER_JOB, encoders)
+    jobs = [todo[i:i + per_job] for i in range(0, len(todo), per_job)]
+    error = None
+    with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), encoders // per_job))) as pool:
+        futures = [pool.submit(run_job, video, targets) for targets in jobs]
+        for future in as_completed(futures):
+            try:
+                targets = future.result()
+            except Exception as e:
+                # Raised once all other jobs finished, so the videos they converted are recorded first
+                error = error or e
+                continue
+            for res, codec, target in targets:
+                manifest.record(target, manifest.entry(source_hash, res, codec))
+            manifest.save()
+    if error is not None:
+        raise error
 
 
 if __name__ == "__main__":
-    convert_videos()
\ No newline at end of file
+    convert_videos()
@@ -2,10 +2,12 @@ import argparse
 import os, sys, datetime
 import time
 
-from pyuac import main_requires_admin
-
-from src.experiment import get_experiments, Experiment
+from src.experiment import get_experiments, load_experiment, load_matrix
 from src.runner import run
+from src.cooldown import CooldownController
+from src.journal import Journal
+from src.samplers import SAMPLERS
+from src.profiling import METRICS_FILE, campaign
 
 
 def cli():
@@ -44,6 +46,128 @@ def cli():
                         type=str,
                         nargs='?',
                         default="results")
+    parser.add_argument("--slots",
+                        help="Number of execution slots that run tasks concurrently.",
+                        dest="slots",
+                        type=int,
+                        nargs='?',
+                        default=1)
+    parser.add_argument("--pin",
+                        help="Pin every slot to its own set of cores.",
+                        dest="pin",
+                        action="store_true")
+    parser.add_argument("--cooldown",
+                        help="Wait until the machine is back at its idle baseline instead of sleeping a fixed time.",
+                        dest="cooldown",
+                        action="store_true")
+    parser.add_argument("--cooldown-tolerance",
+                        help="Relative tolerance around the idle baseline.",
+                        dest="cooldown_tolerance",
+                        type=float,
+                        nargs='?',
+                        default=0.05)
+    parser.add_argument("--cooldown-window",
+                        help="Number of consecutive samples that must be within tolerance.",
+                        dest="cooldown_window",
+                        type=int,
+                        nargs='?',
+                        default=3)
+    parser.add_argument("--cooldown-sample",
+                        help="Duration of one idle sample in seconds.",
+                        dest="cooldown_sample",
+                        type=int,
+                        nargs='?',
+                        default=2)
+    parser.add_argument("--cooldown-max",
+                        help="Maximum cool-down time in seconds.",
+                        dest="cooldown_max",
+                        type=int,
+                        nargs='?',
+                        default=300)
+    parser.add_argument("--sequential",
+                        help="Stop a group once its results are settled instead of always running --iterations.",
+                        dest="sequential",
+                        action="store_true")
+    parser.add_argument("--min-iterations",
+                        help="Number of iterations before the first stopping check.",
+                        dest="min_iterations",
+                        type=int,
+                        nargs='?',
+                        default=5)
+    parser.add_argument("--max-iterations",
+                        help="Maximum number of iterations of a group in sequential mode.",
+                        dest="max_iterations",
+                        type=int,
+                        nargs='?',
+                        default=60)
+    parser.add_argument("--alpha",
+                        help="Significance level of the stopping check.",
+                        dest="alpha",
+                        type=float,
+                        nargs='?',
+                        default=0.05)
+    parser.add_argument("--precision",
+                        help="Required half-width of the 95%% confidence interval of each mean, relative to the mean.",
+                        dest="precision",
+                        type=float,
+                        nargs='?',
+                        default=0.01)
+    parser.add_argument("--resume",
+                        help="Continue the campaign in this output directory where it stopped.",
+                        dest="resume",
+                        type=str,
+                        nargs='?',
+                        default=None)
+    parser.add_argument("--interleave",
+                        help="Order of the runs within a group. Defaults to the interleave of the matrix.",
+                        dest="interleave",
+                        choices=["shuffle", "alternate", "blocked"],
+                        type=str,
+                        nargs='?',
+                        default=None)
+    parser.add_argument("--live",
+                        help="Aggregate the measurements while they are written and flag anomalous runs.",
+                        dest="live",
+                        action="store_true")
+    parser.add_argument("--retries",
+                        help="How often an anomalous run is measured again (with --live).",
+                        dest="retries",
+                        type=int,
+                        nargs='?',
+                        default=1)
+    parser.add_argument("--sampler",
+                        help="Power sampler backend. Only energibridge needs the driver and an elevated environment.",
+                        dest="sampler",
+                        choices=SAMPLERS,
+                        type=str,
+                        nargs='?',
+                        default="energibridge")
+    parser.add_argument("--trace",
+                        help="Recorded measurement CSV the synthetic sampler replays.",
+                        dest="trace",
+                        type=str,
+                        nargs='?',
+                        default=None)
+    parser.add_argument("--in-process",
+                        help="Sample in this process into a preallocated buffer and write a binary file at the end "
+                             "of each run (rapl and synthetic samplers).",
+                        dest="in_process",
+                        action="store_true")
+    parser.add_argument("--batch",
+                        help="Measure this many consecutive runs with one long-lived sampler session and split its "
+                             "trace into the runs afterwards.",
+                        dest="batch",
+                        type=int,
+                        nargs='?',
+                        default=0)
+    parser.add_argument("--profile",
+                        help="Profile the harness with cProfile and write profile.prof into the campaign directory.",
+                        dest="profile",
+                        action="store_true")
+    parser.add_argument("--trace-memory",
+                        help="Record the Python memory use of the harness with tracemalloc.",
+                        dest="trace_memory",
+                        action="store_true")
     parser.add_argument("-e", "--experiments",
                         help="List of experiments to run.",
                         dest="experiments",
@@ -51,7 +175,24 @@ def cli():
                         type=str,
                         nargs='*',
                         default=["all"])
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.in_process and args.sampler == "energibridge":
+        parser.error("--in-process needs a Python sampler (--sampler rapl or synthetic)")
+    if args.in_process and args.live:
+        parser.error("--in-process writes the measurements at the end of a run, so --live cannot follow them")
+    if args.live and args.retries > 0 and args.slots > 1:
+        parser.error("--live re-queues anomalous runs only without --slots; add --retries 0 to only flag them")
+    if args.slots > 1 and args.cooldown:
+        parser.error("--cooldown cannot be combined with --slots, the slots share the machine")
+    if args.sequential and args.max_iterations < args.min_iterations:
+        parser.error("--max-iterations must be at least --min-iterations")
+    if args.sequential and args.resume is not None:
+        parser.error("--resume cannot continue a --sequential campaign, its batches are not journaled")
+    if args.sequential and (args.slots > 1 or args.live):
+        parser.error("--sequential cannot be combined with --slots or --live")
+    if args.batch > 1 and (args.in_process or args.live or args.slots > 1 or args.sequential or args.cooldown):
+        parser.error("--batch cannot be combined with --in-process, --live, --slots, --sequential or --cooldown")
+    return args
 
 def wait_five_minutes():
     wait_duration = 300  # 5 minutes in seconds
@@ -64,54 +205,76 @@ def wait_five_minutes():
         time.sleep(1)
     print()  # Move to next line after countdown is complete.
 
-@main_requires_admin
 def main():
     args = cli()
-    groups = [
-        # Group 1: Decoding 480p (H.264 & H.265)
-        ["decode_480p_h264", "decode_480p_h265"],
-        # Group 2: Decoding 720p (H.264 & H.265)
-        ["decode_720p_h264", "decode_720p_h265"],
-        # Group 3: Decoding 1080p (H.264 & H.265)
-        ["decode_1080p_h264", "decode_1080p_h265"],
-        # Group 4: Decoding 2kp (H.264 & H.265)
-        ["decode_2kp_h264", "decode_2kp_h265"]
-    ]
+    # One group per combination of the matrix's group_by axes, e.g. one per resolution (experiments/matrix.yml)
+    matrix = load_matrix()
+    if matrix is None:
+        print("No experiments/matrix.yml found.")
+        return
+    groups = matrix.groups()
+    if args.interleave is None:
+        args.interleave = matrix.interleave
     
-    # Create a timestamped directory for all experiment groups
-    timestamp_dir = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    base_output_dir = os.path.join(args.output, timestamp_dir)
+    cooldown = None
+    if args.cooldown:
+        cooldown = CooldownController(args)
+        cooldown.calibrate()
+
+    # Create a timestamped directory for all experiment groups, or continue in the one of the resumed campaign
+    if args.resume is not None:
+        base_output_dir = args.resume
+    else:
+        timestamp_dir = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+        base_output_dir = os.path.join(args.output, timestamp_dir)
     if not os.path.exists(base_output_dir):
         os.makedirs(base_output_dir)
+    journal = Journal(base_output_dir)
     
-    # Process each group in order.
-    for index, group in enumerate(groups, start=1):
-        print(f"Starting Group {index}...")
-        experiments = []
-        for name in group:
-            exp = Experiment(name)  # This loads experiments/<name>/config.yml
-            if exp.enabled:
-                experiments.append(exp)
-            else:
-                print(f"Experiment {name} is not enabled; skipping.")
-        if experiments:
-            # Create output directory for the experiment type inside the timestamped directory
-            experiment_type_dir = os.path.join(base_output_dir, group[0].split('_')[1])
-            if not os.path.exists(experiment_type_dir):
-                os.makedirs(experiment_type_dir)
+    # Every task appends its phase timings to the metrics file of the campaign
+    args.metrics = os.path.join(base_output_dir, METRICS_FILE)
+    with campaign(base_output_dir, args.profile, args.trace_memory) as timer:
+        args.campaign = timer.id
+        # Process each group in order.
+        for index, (group_name, group) in enumerate(groups, start=1):
+            print(f"Starting Group {index} ({group_name})...")
+            completed = 0
+            experiments = []
+            for name in group:
+                exp = load_experiment(name)  # This loads experiments/<name>/config.yml once
+                if exp.enabled:
+                    experiments.append(exp)
+                else:
+                    print(f"Experiment {name} is not enabled; skipping.")
+            if experiments:
+                # Create output directory for the experiment type inside the timestamped directory
+                experiment_type_dir = os.path.join(base_output_dir, group_name)
+                if not os.path.exists(experiment_type_dir):
+                    os.makedirs(experiment_type_dir)
             
-            args.output = experiment_type_dir
+                args.output = experiment_type_dir
 
-            run(experiments, args)
-        else:
-            print(f"No enabled experiments found for Group {index}.")
+                completed = run(experiments, args, cooldown, journal)
+            else:
+                print(f"No enabled experiments found for Group {index}.")
         
-        # If not the last group, wait 5 minutes (300 seconds) before the next group.
-        if index < len(groups):
-            print("Group completed. Waiting 5 minutes before the next group...")
-            wait_five_minutes()
+            # If not the last group, wait 5 minutes (300 seconds) before the next group.
+            # A group that was already completed before resuming needs no wait.
+            if index < len(groups) and completed > 0:
+                if cooldown is not None:
+                    print("Group completed. Cooling down before the next group...")
+                    with timer.phase("group_wait"):
+                        print(f"Cooled down for {cooldown.wait()} seconds.")
+                else:
+                    print("Group completed. Waiting 5 minutes before the next group...")
+                    with timer.phase("group_wait"):
+                        wait_five_minutes()
     
     print("All experiment groups completed.")
 
 if __name__ == '__main__':
+    if cli().sampler == "energibridge" and sys.platform == "win32":
+        # The EnergiBridge driver can only be read from an elevated process
+        from pyuac import main_requires_admin
+        main = main_requires_admin(main)
     main()
\ No newline at end of file
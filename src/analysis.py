@@ -0,0 +1,137 @@
+import os, glob
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from src.ingest import ingest_files
+from src.measurements import summarize_energy
+from src.resampling import resample_pair
+from src.store import find_measurement_dirs
+
+GROUP_COLUMNS = ["person", "resolution"]
+
+
+def load_runs(base_dir, cache=None, workers=None):
+    """Builds a long-form table with one row per run of every person, resolution and experiment in base_dir."""
+    keys, files = [], []
+    for person, resolution, experiment, measurements_dir in find_measurement_dirs(base_dir):
+        for file in sorted(glob.glob(os.path.join(measurements_dir, "*.csv"))):
+            keys.append((person, resolution, experiment, experiment.split("_")[-1],
+                         os.path.splitext(os.path.basename(file))[0]))
+            files.append(file)
+
+    summaries, errors = ingest_files(files, workers=workers, cache=cache,
+                                     summarize=cache.summarize if cache is not None else summarize_energy)
+    for error in errors:
+        print(f"Skipping {error}")
+    rows = [key + (summary["total_energy"], summary["duration"])
+            for key, summary in zip(keys, summaries) if summary is not None]
+    return pd.DataFrame(rows, columns=GROUP_COLUMNS + ["experiment", "codec", "run", "total_energy", "duration"])
+
+
+def _padded(runs, experiments, value="total_energy"):
+    """Returns a (len(experiments), max runs) matrix of values, padded with NaN."""
+    groups = runs.groupby(GROUP_COLUMNS + ["experiment"], sort=False)[value]
+    values = [groups.get_group(e).to_numpy(dtype=float) for e in experiments]
+    matrix = np.full((len(values), max(len(v) for v in values)), np.nan)
+    for row, v in zip(matrix, values):
+        row[:len(v)] = v
+    return matrix
+
+
+def zscore_filter(matrix, threshold=3):
+    """Masks values (with NaN) that lie `threshold` or more standard deviations from their row mean."""
+    z = (matrix - np.nanmean(matrix, axis=1, keepdims=True)) / np.nanstd(matrix, axis=1, keepdims=True)
+    return np.where(np.abs(z) < threshold, matrix, np.nan)
+
+
+def compare(a, b, alpha=0.05, normality_alpha=None):
+    """Tests row i of a against row i of b for every row at once. Rows may be padded with NaN.
+
+    alpha is the significance level of the tests; the Shapiro-Wilk tests that choose between Welch and
+    Mann-Whitney use normality_alpha, which defaults to alpha.
+    """
+    normality_alpha = alpha if normality_alpha is None else normality_alpha
+    shapiro_a = stats.shapiro(a, axis=1, nan_policy="omit")
+    shapiro_b = stats.shapiro(b, axis=1, nan_policy="omit")
+    welch = stats.ttest_ind(a, b, axis=1, equal_var=False, nan_policy="omit")
+    mann_whitney = stats.mannwhitneyu(a, b, axis=1, alternative="two-sided", nan_policy="omit")
+
+    mean_a, mean_b = np.nanmean(a, axis=1), np.nanmean(b, axis=1)
+    std_a, std_b = np.nanstd(a, axis=1, ddof=1), np.nanstd(b, axis=1, ddof=1)
+    median_a, median_b = np.nanmedian(a, axis=1), np.nanmedian(b, axis=1)
+    normal = (shapiro_a.pvalue >= normality_alpha) & (shapiro_b.pvalue >= normality_alpha)
+    p_value = np.where(normal, welch.pvalue, mann_whitney.pvalue)
+    return {
+        "n1": np.sum(~np.isnan(a), axis=1),
+        "n2": np.sum(~np.isnan(b), axis=1),
+        "shapiro_w1": shapiro_a.statistic,
+        "shapiro_p1": shapiro_a.pvalue,
+        "shapiro_w2": shapiro_b.statistic,
+        "shapiro_p2": shapiro_b.pvalue,
+        "normal": normal,
+        "welch_t": welch.statistic,
+        "welch_p": welch.pvalue,
+        "mann_whitney_u": mann_whitney.statistic,
+        "mann_whitney_p": mann_whitney.pvalue,
+        "test": np.where(normal, "welch", "mann-whitney"),
+        "p_value": p_value,
+        "significant": p_value < alpha,
+        "mean1": mean_a,
+        "mean2": mean_b,
+        "mean_diff": mean_a - mean_b,
+        "percent_change": (mean_a - mean_b) / mean_a * 100,
+        "cohens_d": (mean_a - mean_b) / np.sqrt((std_a ** 2 + std_b ** 2) / 2),
+        "median1": median_a,
+        "median2": median_b,
+        "median_diff": median_a - median_b,
+        "median_percentage": 100 - median_a * 100 / median_b,
+    }
+
+
+def _resample_pairs(a, b, resamples, confidence, seed, workers=None):
+    """resample_pair for row i of a and b, for every row. With workers, the pairs are spread over processes."""
+    arguments = [a, b, [resamples] * len(a), [confidence] * len(a), [seed] * len(a)]
+    if workers is None or workers <= 1 or len(a) <= 1:
+        return list(map(resample_pair, *arguments))
+    with ProcessPoolExecutor(max_workers=min(workers, len(a))) as pool:
+        return list(pool.map(resample_pair, *arguments))
+
+
+def analyze_all(runs, alpha=0.05, z_threshold=3, value="total_energy", resamples=0, seed=0, workers=None):
+    """Compares every pair of experiments within each person/resolution of a load_runs table.
+
+    All pairs are tested at once, before and after z-score outlier removal. Returns one row per pair and
+    filter state with the normality tests, Welch and Mann-Whitney results and the effect sizes of `value`.
+    With `resamples`, bootstrap confidence intervals and a permutation p-value are added as well.
+    """
+    experiments = list(runs.groupby(GROUP_COLUMNS + ["experiment"], sort=True).groups)
+    pairs = [(e1, e2) for e1, e2 in combinations(experiments, 2) if e1[:2] == e2[:2]]
+    if not pairs:
+        return pd.DataFrame()
+
+    matrix = _padded(runs, experiments, value)
+    index = {e: i for i, e in enumerate(experiments)}
+    first = np.array([index[e1] for e1, _ in pairs])
+    second = np.array([index[e2] for _, e2 in pairs])
+
+    frames = []
+    for filtered, values in [(False, matrix), (True, zscore_filter(matrix, z_threshold))]:
+        frame = pd.DataFrame({
+            "person": [e1[0] for e1, _ in pairs],
+            "resolution": [e1[1] for e1, _ in pairs],
+            "exp1": [e1[2] for e1, _ in pairs],
+            "exp2": [e2[2] for _, e2 in pairs],
+            "filtered": filtered,
+        })
+        for column, result in compare(values[first], values[second], alpha).items():
+            frame[column] = result
+        if resamples:
+            resampled = _resample_pairs(values[first], values[second], resamples, 1 - alpha, seed, workers)
+            for column in resampled[0]:
+                frame[column] = [row[column] for row in resampled]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,196 @@
+import os, sys, json, time, shutil, argparse, datetime, tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from src.analysis import load_runs, analyze_all
+from src.experiment import MATRIX_PATH, Matrix
+from src.hosts import host_info
+from src.plots import render_all, report_jobs
+from src.runner import generate_tasks
+from src.store import ingest, partitions, Partition
+from src.traces import Traces
+
+BENCHMARK_DIR = "benchmarks"
+CORES = 4
+# A stage that got this much slower than the baseline is reported as a regression
+REGRESSION = 1.2
+
+
+def peak_rss():
+    """Peak resident set size in bytes of this process and its finished children, or None if unknown.
+
+    This is the high-water mark since the process started, so it never goes down between stages.
+    """
+    try:
+        import resource
+    except ImportError:
+        if sys.platform != "win32":
+            return None
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+def make_corpus(root, runs, samples=50, interval=200, persons=2, resolutions=2, seed=0):
+    """Writes `runs` synthetic measurement CSVs in the final_results layout, spread evenly over
+    persons x resolutions x two codecs. Every run has `samples` rows. Returns the number of runs written."""
+    rng = np.random.default_rng(seed)
+    columns = (["Delta", "Time"] + [f"CPU_FREQUENCY_{i}" for i in range(CORES)] +
+               [f"CPU_USAGE_{i}" for i in range(CORES)] +
+               ["PACKAGE_ENERGY (J)", "TOTAL_MEMORY", "TOTAL_SWAP", "USED_MEMORY", "USED_SWAP"])
+    fmt = ["%d", "%d"] + ["%d"] * CORES + ["%.4f"] * CORES + ["%.6f", "%d", "%d", "%d", "%d"]
+    experiments = [(f"person{p}", f"{480 * (r + 1)}p", codec)
+                   for p in range(persons) for r in range(resolutions) for codec in ["h264", "h265"]]
+    per_experiment = max(1, runs // len(experiments))
+    for person, resolution, codec in experiments:
+        measurements = os.path.join(root, person, resolution, f"decode_{resolution}_{codec}", "measurements")
+        os.makedirs(measurements, exist_ok=True)
+        power = 20.0 if codec == "h264" else 25.0
+        for run in range(1, per_experiment + 1):
+            data = np.empty((samples, len(columns)))
+            data[:, 0] = interval
+            data[0, 0] = 0
+            data[:, 1] = 1.7e12 + run * 1e6 + np.cumsum(data[:, 0])
+            data[:, 2:2 + CORES] = rng.integers(1600, 3600, (samples, CORES))
+            data[:, 2 + CORES:2 + 2 * CORES] = rng.uniform(0, 100, (samples, CORES))
+            data[:, 2 + 2 * CORES] = 5000 + np.cumsum(rng.normal(power, 1.0, samples) * data[:, 0] / 1e3)
+            data[:, -4:] = [16 * 2 ** 30, 32 * 2 ** 30, 8 * 2 ** 30, 0]
+            np.savetxt(os.path.join(measurements, f"{run}.csv"), data, fmt=fmt, delimiter=",",
+                       header=",".join(columns), comments="")
+    return per_experiment * len(experiments)
+
+
+class Benchmark:
+    """Times the stages of a benchmark run and records their throughput and the cumulative peak RSS after each
+    stage."""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, items, unit="runs"):
+        print(f"Benchmarking {name}...", end=" ", flush=True)
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        self.stages[name] = {
+            "seconds": seconds,
+            "items": items,
+            "unit": unit,
+            "throughput": items / seconds if seconds > 0 else None,
+            "peak_rss_cumulative": peak_rss(),
+        }
+        print(f"{seconds:.3f} s ({items} {unit})")
+
+
+def run_benchmark(runs=1000, samples=50, workers=None, resamples=0, plots=False, seed=0, work_dir=None):
+    """Runs every stage on a fresh synthetic corpus and returns the results."""
+    work_dir = work_dir or tempfile.mkdtemp(prefix="benchmark-")
+    corpus, store = os.path.join(work_dir, "final_results"), os.path.join(work_dir, "measurement_store")
+    benchmark = Benchmark()
+    try:
+        with benchmark.stage("corpus", runs):
+            runs = make_corpus(corpus, runs, samples, seed=seed)
+        benchmark.stages["corpus"]["items"] = runs
+
+        matrix = Matrix(MATRIX_PATH)
+        cells = len(list(matrix.cells()))
+        repetitions = max(1, runs // cells)
+        with benchmark.stage("commands", repetitions * cells, "experiments"):
+            for _ in range(repetitions):
+                matrix = Matrix(MATRIX_PATH)
+                # The properties resolve the commands and paths, which is what these two stages time
+                for experiment in matrix.experiments():
+                    experiment.command
+
+        experiments = list(matrix.experiments())
+        settings = argparse.Namespace(iterations=max(1, runs // len(experiments)), interleave="shuffle", warmup=0,
+                                      output=os.path.join(work_dir, "results"))
+        with benchmark.stage("tasks", settings.iterations * len(experiments), "tasks"):
+            for task in generate_tasks(experiments, settings, seed):
+                task.measurements_output_path, task.log_output_path, task.info_output_path
+
+        with benchmark.stage("csv_ingest", runs):
+            table = load_runs(corpus, workers=workers)
+        with benchmark.stage("store_ingest", runs):
+            ingest(corpus, store)
+        with benchmark.stage("store_totals", runs):
+            for key in partitions(store):
+                Partition(store, *key).total_energy()
+        with benchmark.stage("statistics", runs):
+            analyze_all(table)
+        if resamples:
+            with benchmark.stage("resampling", runs):
+                analyze_all(table, resamples=resamples, seed=seed, workers=workers)
+        with benchmark.stage("traces", runs * samples, "samples"):
+            for key in partitions(store):
+                Traces(Partition(store, *key)).resample()
+        if plots:
+            with benchmark.stage("plots", runs):
+                render_all(report_jobs(table, os.path.join(work_dir, "graphs")), work_dir, workers)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "host": host_info(),
+        "config": {"runs": runs, "samples": samples, "workers": workers, "resamples": resamples, "plots": plots,
+                   "seed": seed},
+        "stages": benchmark.stages,
+    }
+
+
+def compare(results, baseline):
+    """Returns {stage: seconds / baseline seconds} for the stages both runs have."""
+    return {stage: result["seconds"] / baseline["stages"][stage]["seconds"]
+            for stage, result in results["stages"].items()
+            if stage in baseline["stages"] and baseline["stages"][stage]["seconds"] > 0}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the runner and analysis on a synthetic corpus.")
+    parser.add_argument("--runs", help="Number of runs in the corpus.", dest="runs", type=int, default=1000)
+    parser.add_argument("--samples", help="Samples per run.", dest="samples", type=int, default=50)
+    parser.add_argument("--workers", help="Number of processes of the parallel stages.", dest="workers", type=int,
+                        default=None)
+    parser.add_argument("--resamples", help="Also benchmark the bootstrap and permutation tests.",
+                        dest="resamples", type=int, default=0)
+    parser.add_argument("--plots", help="Also benchmark rendering the plots.", dest="plots", action="store_true")
+    parser.add_argument("--seed", dest="seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Results file. Defaults to benchmarks/<host>-<time>.json.",
+                        dest="output", type=str, default=None)
+    parser.add_argument("--baseline", help="Earlier results file to compare with.", dest="baseline", type=str,
+                        default=None)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.runs, args.samples, args.workers, args.resamples, args.plots, args.seed)
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, f"{results['host']['host']}-{datetime.datetime.now():%Y-%m-%d-%H-%M-%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {output}")
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            ratios = compare(results, json.load(f))
+        for stage, ratio in ratios.items():
+            print(f"{stage:>14}: {ratio:.2f}x the baseline{'  REGRESSION' if ratio > REGRESSION else ''}")
+        if any(ratio > REGRESSION for ratio in ratios.values()):
+            sys.exit(1)
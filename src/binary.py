@@ -0,0 +1,138 @@
+import os, json, struct, argparse
+
+import numpy as np
+import pandas as pd
+
+from src.store import column_dtype
+from src.samplers import sample_process
+
+MAGIC = b"EBIN"
+VERSION = 1
+EXTENSION = ".ebin"
+# Columns that do not change during a run; they are stored once in the header instead of in every sample
+STATIC_COLUMNS = ["TOTAL_MEMORY", "TOTAL_SWAP"]
+# 65536 samples are more than 3.5 hours at a 200 ms interval, so a run is normally written at its end only
+CAPACITY = 1 << 16
+
+
+def row_dtype(columns):
+    return np.dtype([(column, column_dtype(column)) for column in columns])
+
+
+class RingBuffer:
+    """Preallocated, fixed-size buffer of samples.
+
+    When the buffer is full, its samples are handed to `spill` first; without `spill`, the oldest samples are
+    overwritten.
+    """
+
+    def __init__(self, columns, capacity=CAPACITY, spill=None):
+        self.data = np.zeros(capacity, dtype=row_dtype(columns))
+        self.spill = spill
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        if self.count == len(self.data) and self.spill is not None:
+            self.spill(self.drain())
+        self.data[self.head] = row
+        self.head = (self.head + 1) % len(self.data)
+        self.count = min(self.count + 1, len(self.data))
+
+    def drain(self):
+        """Returns the buffered samples, oldest first, and empties the buffer."""
+        index = (self.head - self.count + np.arange(self.count)) % len(self.data)
+        rows = self.data[index]
+        self.count = 0
+        return rows
+
+
+class BinaryWriter:
+    """Writes samples in the binary measurement format.
+
+    The file holds MAGIC, the version (uint16), the length of the JSON header (uint32), the header and then the
+    samples as packed rows. Delta is not stored, it follows from Time; the static columns are in the header.
+    """
+
+    def __init__(self, path, columns, interval=None, capacity=CAPACITY):
+        self.path = path
+        self.columns = list(columns)
+        self.stored = ["Time"] + [c for c in self.columns if c not in ["Delta", "Time"] + STATIC_COLUMNS]
+        self.interval = interval
+        self.static = None
+        self.buffer = RingBuffer(self.stored, capacity, spill=self._write)
+        self._file = None
+
+    def append(self, delta, now, values):
+        row = dict(zip(self.columns[2:], values))
+        if self.static is None:
+            self.static = {c: row[c] for c in STATIC_COLUMNS if c in row}
+        self.buffer.append(tuple([now] + [row[c] for c in self.stored[1:]]))
+
+    def _write(self, rows):
+        if self._file is None:
+            header = json.dumps({
+                "columns": self.columns,
+                "stored": self.stored,
+                "dtype": row_dtype(self.stored).descr,
+                "static": self.static or {},
+                "interval": self.interval,
+            }).encode()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "wb")
+            self._file.write(MAGIC + struct.pack("<HI", VERSION, len(header)) + header)
+        self._file.write(rows.tobytes())
+
+    def close(self):
+        self._write(self.buffer.drain())
+        self._file.close()
+
+
+def record_binary(sampler, process, output, interval=200, max_execution=0, capacity=CAPACITY):
+    """Samples the already started process in this Python process and writes the binary file at the end.
+
+    Returns the exit code of the process.
+    """
+    writer = BinaryWriter(output, sampler.columns(), interval, capacity)
+    try:
+        return sample_process(sampler, process, interval, max_execution, writer.append)
+    finally:
+        writer.close()
+
+
+def read_binary(path):
+    """Returns the header and the samples (a structured array) of a binary measurement file."""
+    with open(path, "rb") as f:
+        magic, (version, length) = f.read(4), struct.unpack("<HI", f.read(6))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} binary measurement file")
+        header = json.loads(f.read(length))
+        rows = np.frombuffer(f.read(), dtype=np.dtype([tuple(field) for field in header["dtype"]]))
+    return header, rows
+
+
+def to_frame(path):
+    """The samples of a binary measurement file in the column layout of the EnergiBridge CSV files."""
+    header, rows = read_binary(path)
+    time = rows["Time"]
+    data = {"Delta": np.diff(time, prepend=time[:1]), "Time": time}
+    for column in header["columns"][2:]:
+        data[column] = rows[column] if column in header["stored"] else np.full(len(rows), header["static"][column])
+    return pd.DataFrame(data, columns=header["columns"])
+
+
+def to_csv(path, output=None):
+    output = output or os.path.splitext(path)[0] + ".csv"
+    to_frame(path).to_csv(output, index=False)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert binary measurement files to the EnergiBridge CSV layout.")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+    for file in args.files:
+        print(f"Converted {file} to {to_csv(file)}")
@@ -0,0 +1,93 @@
+import os, json, hashlib
+
+from src.measurements import summarize_run
+
+CACHE_VERSION = 4
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class SummaryCache:
+    """Persistent cache of per-run summaries, keyed by file path, size, mtime and content hash.
+
+    Entries are only recomputed when a file's size or mtime changed and its content hash differs too. A file is
+    only hashed when its mtime changed but its size did not, never when it is first cached. Entries of files
+    that no longer exist are evicted on save. `summarize` computes the summary of a file; a cache written with
+    a different function is discarded.
+    """
+
+    def __init__(self, path=".energy_cache.json", summarize=summarize_run):
+        self.path = path
+        self.summarize = summarize
+        self._entries = {}
+        self._digests = {}
+        self._dirty = False
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION and data.get("summarize") == summarize.__name__:
+                self._entries = data["entries"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.save()
+
+    def lookup(self, file):
+        """Returns the cached summary if the file is unchanged since it was cached, otherwise None.
+
+        When only the mtime changed, the content hash decides: a touched or copied but unchanged file keeps its
+        summary.
+        """
+        key = os.path.abspath(file)
+        stat = os.stat(key)
+        entry = self._entries.get(key)
+        if entry is None or entry["size"] != stat.st_size:
+            return None
+        if entry["mtime"] == stat.st_mtime:
+            return entry["summary"]
+        self._digests[key] = file_hash(key)
+        if entry["hash"] != self._digests[key]:
+            return None
+        entry["hash"], entry["mtime"] = self._digests.pop(key), stat.st_mtime
+        self._dirty = True
+        return entry["summary"]
+
+    def store(self, file, summary):
+        key = os.path.abspath(file)
+        stat = os.stat(key)
+        # The hash is only known if the file was hashed while looking it up
+        self._entries[key] = {"hash": self._digests.pop(key, None), "size": stat.st_size, "mtime": stat.st_mtime,
+                              "summary": summary}
+        self._dirty = True
+
+    def get(self, file):
+        summary = self.lookup(file)
+        if summary is None:
+            summary = self.summarize(os.path.abspath(file))
+            self.store(file, summary)
+        return summary
+
+    def evict_missing(self):
+        missing = [key for key in self._entries if not os.path.exists(key)]
+        for key in missing:
+            del self._entries[key]
+        self._dirty = self._dirty or bool(missing)
+        return len(missing)
+
+    def save(self):
+        self.evict_missing()
+        if not self._dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "summarize": self.summarize.__name__, "entries": self._entries}, f)
+        os.replace(tmp, self.path)
+        self._dirty = False
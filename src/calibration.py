@@ -0,0 +1,143 @@
+import os, sys, glob, json, platform, argparse
+
+import numpy as np
+import pandas as pd
+
+from src.energiBridge import EnergiBridge
+from src.measurements import summarize_energy
+
+CALIBRATION_DIR = os.path.join(os.path.dirname(__file__), "..", "calibration")
+
+
+def workloads(duration):
+    """The commands measured during calibration.
+
+    idle sleeps for `duration` seconds and gives the baseline power including the sampler itself. null exits
+    immediately and gives the fixed cost of starting a measurement. wrapper adds the PowerShell wrapper of
+    string commands on top of that.
+    """
+    python = f'\"{sys.executable}\"'
+    shell = "powershell" if sys.platform == "win32" else "pwsh"
+    return {
+        "idle": f'{python} -c \"import time; time.sleep({duration})\"',
+        "null": f'{python} -c \"pass\"',
+        "wrapper": f"{shell} -Command exit",
+    }
+
+
+def model_path(host=None):
+    return os.path.join(CALIBRATION_DIR, f"{host or platform.node()}.json")
+
+
+def calibrate(intervals, repetitions=10, duration=5, output_dir=None):
+    """Measures every workload `repetitions` times at each sampling interval and returns the overhead model.
+
+    For every interval the model holds the idle power (W) and the fixed energy (J) of each other workload on
+    top of the idle power.
+    """
+    output_dir = output_dir or os.path.join(CALIBRATION_DIR, platform.node())
+    os.makedirs(output_dir, exist_ok=True)
+    model = {"host": platform.node(), "duration": duration, "repetitions": repetitions, "intervals": {}}
+    for interval in intervals:
+        energibridge = EnergiBridge(argparse.Namespace(interval=interval))
+        energies, durations = {}, {}
+        for name, command in workloads(duration).items():
+            summaries = []
+            for i in range(repetitions):
+                print(f"Calibrating {name} at {interval} ms ({i + 1}/{repetitions})", end="\r")
+                output = os.path.join(output_dir, f"{name}_{interval}_{i}.csv")
+                summaries.append(summarize_energy(energibridge.measure(command, output)))
+            energies[name] = np.array([s["total_energy"] for s in summaries])
+            durations[name] = np.array([s["duration"] for s in summaries])
+        print()
+
+        idle_power = float(np.mean(energies["idle"] / durations["idle"]))
+        entry = {"idle_power": idle_power}
+        for name in energies:
+            if name != "idle":
+                entry[name] = float(np.mean(energies[name] - idle_power * durations[name]))
+        model["intervals"][str(interval)] = entry
+    return model
+
+
+def save_model(model, path=None):
+    path = path or model_path(model["host"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(model, f, indent=4)
+    return path
+
+
+def load_model(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_models(specs):
+    """Loads overhead models keyed by the host (or contributor) they apply to.
+
+    Every spec is a model file or a directory like calibration/, keyed by the host the models were calibrated
+    on, or NAME=model.json to apply a model to the runs of another host or contributor, like legacy results
+    without a recorded host.
+    """
+    models = {}
+    for spec in specs:
+        name, _, path = spec.rpartition("=") if "=" in spec else (None, None, spec)
+        files = sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+        for model in map(load_model, files):
+            models[name or model["host"]] = model
+    return models
+
+
+def overhead(model, interval, duration, fixed=("wrapper",)):
+    """Energy (J) of a run of `duration` seconds that is not spent by the workload, or None if the model has
+    no calibration at that interval.
+
+    The idle power at the sampling interval covers the machine and the sampler; `fixed` names the per-run
+    startup costs to subtract as well. "wrapper" already includes the cost of starting a measurement.
+    """
+    entry = model["intervals"].get(str(interval))
+    if entry is None:
+        return None
+    return entry["idle_power"] * duration + sum(entry[name] for name in fixed)
+
+
+def subtract_overhead(runs, models, interval=200):
+    """Adds a net_energy column to a runs table of federation.load_federated.
+
+    Every run is corrected with the model of its host (or else of its contributor), at its own sampling
+    interval (or `interval` if its info file has none). A run started through a shell wrapper pays the wrapper
+    cost, an argv launch only the cost of starting a measurement. Runs without a model or without a
+    calibration at their interval get no net energy.
+    """
+    runs = runs.copy()
+    runs["net_energy"] = np.nan
+    missing = set()
+    groups = runs.groupby(["person", "host", "interval", "wrapped"], dropna=False).groups
+    for (person, host, run_interval, wrapped), index in groups.items():
+        model = models.get(host, models.get(person))
+        if model is None:
+            missing.add(str(host))
+            continue
+        run_interval = interval if pd.isna(run_interval) else int(run_interval)
+        fixed = ("wrapper",) if wrapped else ("null",)
+        energy = overhead(model, run_interval, runs.loc[index, "duration"], fixed)
+        if energy is None:
+            missing.add(f"{host} at {run_interval} ms")
+            continue
+        runs.loc[index, "net_energy"] = runs.loc[index, "total_energy"] - energy
+    if missing:
+        print(f"No overhead model for {', '.join(sorted(missing))}; these runs are left out of the net energy.")
+    return runs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate the measurement overhead of this host.")
+    parser.add_argument("-i", "--intervals", help="Sampling intervals to calibrate.", dest="intervals", type=int,
+                        nargs="+", default=[200])
+    parser.add_argument("--repetitions", help="Measurements per workload and interval.", dest="repetitions",
+                        type=int, default=10)
+    parser.add_argument("--duration", help="Duration of the idle workload in seconds.", dest="duration", type=int,
+                        default=5)
+    args = parser.parse_args()
+    print(f"Overhead model written to {save_model(calibrate(args.intervals, args.repetitions, args.duration))}")
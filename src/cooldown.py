@@ -0,0 +1,74 @@
+import os, tempfile, time
+
+import pandas as pd
+
+from src.energiBridge import EnergiBridge
+from src.measurements import energy_column
+
+
+def read_idle(file):
+    """Returns the mean power (W), frequency (MHz) and temperature of an idle measurement CSV."""
+    data = pd.read_csv(file)
+    readings = {}
+    column = energy_column(data.columns)
+    duration = (data["Time"].iloc[-1] - data["Time"].iloc[0]) / 1e3
+    if column is not None and duration > 0:
+        readings["power"] = float(data[column].iloc[-1] - data[column].iloc[0]) / duration
+    frequency_columns = [c for c in data.columns if c.startswith("CPU_FREQUENCY_")]
+    if frequency_columns:
+        readings["frequency"] = float(data[frequency_columns].to_numpy().mean())
+    temperature_columns = [c for c in data.columns if "TEMP" in c.upper()]
+    if temperature_columns:
+        readings["temperature"] = float(data[temperature_columns].to_numpy().mean())
+    return readings
+
+
+class CooldownController:
+    """Waits between tasks until the machine is back at its idle baseline instead of sleeping a fixed time.
+
+    `sample` measures the idle machine and returns a dict of readings; by default EnergiBridge is used.
+    The wait ends once `window` consecutive samples are within `tolerance` (relative) of the baseline,
+    or after `ceiling` seconds.
+    """
+
+    def __init__(self, settings, sample=None):
+        self.settings = settings
+        self.tolerance = settings.cooldown_tolerance
+        self.window = settings.cooldown_window
+        self.ceiling = settings.cooldown_max
+        self.sample_seconds = settings.cooldown_sample
+        self.baseline = None
+        self._sample = sample if sample is not None else self._sample_energibridge
+
+    def _sample_energibridge(self):
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            return read_idle(EnergiBridge(self.settings).sample(self.sample_seconds, path))
+        finally:
+            os.remove(path)
+
+    def calibrate(self):
+        """Measures the idle baseline as the median of `window` samples."""
+        samples = [self._sample() for _ in range(self.window)]
+        self.baseline = {key: sorted(s[key] for s in samples)[len(samples) // 2] for key in samples[0]}
+        print(f"Idle baseline: {self.baseline}")
+        return self.baseline
+
+    def is_stable(self, readings):
+        return all(abs(readings[key] - value) <= self.tolerance * abs(value)
+                   for key, value in self.baseline.items() if key in readings)
+
+    def wait(self, ceiling=None):
+        """Blocks until the machine is at its baseline. Returns the number of seconds waited."""
+        if self.baseline is None:
+            self.calibrate()
+        ceiling = self.ceiling if ceiling is None else ceiling
+        start = time.monotonic()
+        stable = 0
+        while stable < self.window and time.monotonic() - start < ceiling:
+            readings = self._sample()
+            stable = stable + 1 if self.is_stable(readings) else 0
+            print(f"Cooling down: {int(time.monotonic() - start)} seconds, {stable}/{self.window} stable samples", end="\r")
+        print()
+        return round(time.monotonic() - start, 3)
@@ -1,9 +1,36 @@
 from __future__ import annotations
 
-import subprocess, os, sys, datetime, json
+import subprocess, os, sys, datetime, json, platform, time
 from pathlib import Path
 
 from src.experiment import Experiment
+from src.live import LiveMonitor
+from src.hosts import host_info
+from src.samplers import make_sampler
+from src.binary import EXTENSION, record_binary, to_csv
+from src.profiling import Timer, record_task
+
+# Longest wait for the first sample of a sampler before the workload counts as started anyway
+FIRST_SAMPLE_TIMEOUT = 5
+
+
+def first_sample(path, process, timeout=FIRST_SAMPLE_TIMEOUT, poll=0.005):
+    """Waits until the sampler started as process wrote its first sample to path.
+
+    Returns False if the sampler exited or wrote nothing within timeout seconds. This relies on the sampler
+    flushing every row, like EnergiBridge does; one that buffers its output is only waited for up to the timeout.
+    """
+    deadline = time.perf_counter() + timeout
+    while process.poll() is None and time.perf_counter() < deadline:
+        try:
+            with open(path, "rb") as f:
+                # The header and the first row, no need to read the rest of a growing file
+                if f.read(4096).count(b"\n") >= 2:
+                    return True
+        except OSError:
+            pass
+        time.sleep(poll)
+    return False
 
 
 class Task:
@@ -12,6 +39,11 @@ class Task:
         self.experiment = experiment
         self.settings = settings
         self._file_name = str(id)
+        self.slot = None
+        self.cooldown = None
+        self.attempt = 1
+        self.anomalies = []
+        self.timer = Timer()
 
     @property
     def log_output_path(self):
@@ -25,47 +57,266 @@ class Task:
     def info_output_path(self):
         return os.path.join(self.settings.output, self.experiment.name, 'info', self._file_name + '.json')
 
-    def run(self):
-        EnergiBridge(self.settings).run(self)
+    @property
+    def binary_output_path(self):
+        return os.path.join(self.settings.output, self.experiment.name, 'measurements', self._file_name + EXTENSION)
+
+    @property
+    def summary_output_path(self):
+        return os.path.join(self.settings.output, self.experiment.name, 'summary', self._file_name + '.json')
+
+    def run(self, session=None):
+        if session is not None:
+            EnergiBridge(self.settings).run_in_session(self, session)
+        else:
+            EnergiBridge(self.settings).run(self)
 
 class EnergiBridge:
     def __init__(self, settings) -> None:
         self.settings = settings
         pass
 
-    def cmd(self, task: Task):
-        program_path = '\"' + os.path.join(os.path.dirname(__file__), "..", "energibridge", "energibridge")
+    def sampler(self):
+        return getattr(self.settings, "sampler", "energibridge")
+
+    def program_path(self):
+        return " ".join('\"' + arg + '\"' for arg in self.program_argv())
+
+    def program(self):
+        program = os.path.join(os.path.dirname(__file__), "..", "energibridge", "energibridge")
         if sys.platform == "win32":
-            program_path += ".exe"
-        program_path += '\"'
-        return [program_path, "-i", str(self.settings.interval), "--max-execution", str(task.experiment.max_execution),
+            program += ".exe"
+        return program
+
+    def program_argv(self):
+        """The sampler program: the EnergiBridge binary, or a Python backend of src/samplers.py that takes the
+        same arguments and writes the same CSV schema."""
+        if self.sampler() == "energibridge":
+            return [self.program()]
+        argv = [sys.executable, "-m", "src.samplers", self.sampler()]
+        if getattr(self.settings, "trace", None):
+            argv += ["--trace", self.settings.trace]
+        return argv
+
+    def cmd(self, task: Task):
+        return [self.program_path(), "-i", str(self.settings.interval), "--max-execution", str(task.experiment.max_execution),
                 "-o", f"\"{task.measurements_output_path}\"", "--command-output", f"\"{task.log_output_path}\""]
 
-    def run(self, task: Task):
-        start = datetime.datetime.now()
+    def argv(self, task: Task):
+        """Like cmd, but unquoted, for executing EnergiBridge directly without a shell."""
+        return self.program_argv() + ["-i", str(self.settings.interval), "--max-execution", str(task.experiment.max_execution),
+                "-o", task.measurements_output_path, "--command-output", task.log_output_path]
 
-        os.makedirs(os.path.dirname(task.measurements_output_path), exist_ok=True)
-        os.makedirs(os.path.dirname(task.log_output_path), exist_ok=True)
-        os.makedirs(os.path.dirname(task.info_output_path), exist_ok=True)
+    def session_argv(self, output_path, log_path, command):
+        """Starts one sampler for a whole session of tasks (see src/session.py); it runs until command exits."""
+        return self.program_argv() + ["-i", str(self.settings.interval), "--max-execution", "0",
+                "-o", output_path, "--command-output", log_path, "--"] + command
+
+    def in_process(self):
+        return getattr(self.settings, "in_process", False)
+
+    def launch(self, task: Task, env, log=None, workload_only=False):
+        """Starts EnergiBridge for the task and returns the process.
+
+        An argv list command is executed directly; a string command goes through a shell like before.
+        With workload_only (in-process mode and sessions) only the workload is started, with its output going
+        to `log`.
+        """
+        command = task.experiment.command
+        cores = task.slot.cores if task.slot is not None else None
+        preexec_fn = None
+        if cores and sys.platform != "win32":
+            # The affinity is inherited by EnergiBridge and the workload it starts
+            preexec_fn = lambda: os.sched_setaffinity(0, cores)
+
+        if workload_only:
+            return subprocess.Popen(command, shell=not isinstance(command, list), env=env, preexec_fn=preexec_fn,
+                                    stdout=log, stderr=log)
+
+        if isinstance(command, list):
+            argv = self.argv(task) + ['--'] + command
+            if cores and sys.platform == "win32":
+                argv = ["cmd", "/c", "start", "", "/b", "/wait", "/affinity", f"{sum(1 << core for core in cores):X}"] + argv
+            return subprocess.Popen(argv, env=env, preexec_fn=preexec_fn)
+
+        cmd = " ".join(self.cmd(task) + ['--', command])
+        if cores and sys.platform == "win32":
+            mask = sum(1 << core for core in cores)
+            cmd = f'start "" /b /wait /affinity {mask:X} ' + cmd
+        return subprocess.Popen(cmd, shell=True, env=env, preexec_fn=preexec_fn)
+
+    def launch_workload(self, task: Task, env, log, o):
+        """Starts only the workload of the task, like launch with workload_only.
+
+        A workload that cannot be started (e.g. a missing executable) does not abort the campaign: the error is
+        written to the log and as `error` to the info o, and None is returned.
+        """
+        try:
+            return self.launch(task, env, log, workload_only=True)
+        except OSError as e:
+            log.write(f"Could not start the workload: {e}\n")
+            o["error"] = str(e)
+            print(f"FAILED ({e})", end=' ')
+            return None
+
+    def measure(self, command, output_path, interval=None):
+        """Measures an arbitrary command outside of a task, e.g. for calibration."""
+        interval = self.settings.interval if interval is None else interval
+        cmd = [self.program_path(), "-i", str(interval), "-o", f"\"{output_path}\"", "--", command]
+        subprocess.Popen(" ".join(cmd), shell=True).wait()
+        return output_path
+
+    def sample(self, seconds, output_path):
+        """Measures the idle machine for `seconds` while a sleeping Python process is the workload."""
+        return self.measure(f'\"{sys.executable}\" -c \"import time; time.sleep({seconds})\"', output_path)
+
+    def info(self, task: Task, start):
+        """The start of the info file of a run."""
         o = {
             "startingTime": start.isoformat(),
-            "energiBridgeCmd": " ".join(self.cmd(task)),
+            # An argv list command is executed without a shell, so its exact argv is recorded
+            "energiBridgeCmd": (self.argv(task) + ["--"] + task.experiment.command
+                                if isinstance(task.experiment.command, list) else " ".join(self.cmd(task))),
             "taskCmd": task.experiment.command,
+            "host": platform.node(),
+            "interval": self.settings.interval,
+            "hostInfo": host_info(),
+            "sampler": self.sampler(),
         }
+        if task.cooldown is not None:
+            o["cooldown"] = task.cooldown
+        if task.slot is not None:
+            o["slot"] = task.slot.index
+            o["cores"] = task.slot.cores
+        if task.attempt > 1:
+            o["attempt"] = task.attempt
+        return o
 
+    def environment(self, task: Task):
         #file = Path(task.log_output_path).relative_to(os.getcwd()).as_posix()
         log_output_path_abs = os.path.abspath(task.log_output_path)
         file = Path(log_output_path_abs).relative_to(Path(os.getcwd())).as_posix()
 
-        
-        os.environ["FFREPORT"] = f'file={file}:level=32'
-        os.environ["RUST_BACKTRACE"] = "full"
+        # Passed to the process instead of set globally, so concurrent slots do not overwrite each other's report file
+        env = dict(os.environ)
+        env["FFREPORT"] = f'file={file}:level=32'
+        env["RUST_BACKTRACE"] = "full"
+        return env
+
+    def make_directories(self, task: Task):
+        os.makedirs(os.path.dirname(task.measurements_output_path), exist_ok=True)
+        os.makedirs(os.path.dirname(task.log_output_path), exist_ok=True)
+        os.makedirs(os.path.dirname(task.info_output_path), exist_ok=True)
+
+    def run(self, task: Task):
+        start = datetime.datetime.now()
+        timer = task.timer
+
+        with timer.phase("directories"):
+            self.make_directories(task)
+        with timer.phase("environment"):
+            o = self.info(task, start)
+            env = self.environment(task)
+        with timer.phase("sampler_setup"):
+            monitor = None
+            if getattr(self.settings, "live", False):
+                # A measurement file of an earlier attempt would otherwise be read as the start of this run
+                if os.path.exists(task.measurements_output_path):
+                    os.remove(task.measurements_output_path)
+                monitor = LiveMonitor(task.measurements_output_path).start()
+            sampler = None
+            if self.in_process():
+                # Set up before the workload starts, so opening the sensor is not part of the measurement
+                sampler = make_sampler(self.sampler(), getattr(self.settings, "trace", None))
+                o["inProcess"] = True
         print(f"[TASK {task.experiment.name} - {task.id}] started at {start}", end=' ')
         try:
-            process = subprocess.Popen(" ".join(self.cmd(task) + ['--', task.experiment.command]), shell=True)
-            process.wait()
+            if sampler is None:
+                if monitor is None and os.path.exists(task.measurements_output_path):
+                    # Its first sample tells when the sampler is ready, so it must not be one of an earlier attempt
+                    os.remove(task.measurements_output_path)
+                launched = time.perf_counter()
+                with timer.phase("spawn"):
+                    process = self.launch(task, env)
+                with timer.phase("sampler_ready"):
+                    ready = first_sample(task.measurements_output_path, process)
+                if ready:
+                    # Until EnergiBridge is actually running, which includes a shell in front of it
+                    o["launchLatency"] = time.perf_counter() - launched
+                with timer.phase("workload"):
+                    process.wait()
+            else:
+                with open(task.log_output_path, "w") as log:
+                    with timer.phase("spawn"):
+                        process = self.launch_workload(task, env, log, o)
+                    if process is not None:
+                        # Popen returns once the workload was executed
+                        o["launchLatency"] = timer.phases["spawn"]
+                        with timer.phase("workload"):
+                            record_binary(sampler, process, task.binary_output_path, self.settings.interval,
+                                          task.experiment.max_execution)
+                if process is not None:
+                    with timer.phase("convert"):
+                        # The CSV layout the analysis reads is produced after the measurement
+                        to_csv(task.binary_output_path, task.measurements_output_path)
         finally:
             print(f"DONE in {datetime.datetime.now() - start}")
             o["endingTime"] = datetime.datetime.now().isoformat()
+            with timer.phase("finalize"):
+                if monitor is not None:
+                    summary = monitor.stop()
+                    task.anomalies = summary["anomalies"]
+                    o["anomalies"] = [a["type"] for a in task.anomalies]
+                    os.makedirs(os.path.dirname(task.summary_output_path), exist_ok=True)
+                    with open(task.summary_output_path, "w") as f:
+                        json.dump(summary, f, indent=4)
+            # Written after finalize, so the info file and the metrics both hold every phase
+            o["phases"] = timer.phases
             with open(task.info_output_path, "w") as f:
                 json.dump(o, f, indent=4)
+            if getattr(self.settings, "metrics", None):
+                record_task(self.settings.metrics, task, getattr(self.settings, "campaign", None))
+
+    def run_in_session(self, task: Task, session):
+        """Runs the workload of the task under the already running sampler of a session.
+
+        Only the start and end of the run are marked in the session; its measurements and info file are written
+        when the session trace is split.
+        """
+        start = datetime.datetime.now()
+        timer = task.timer
+
+        with timer.phase("directories"):
+            self.make_directories(task)
+        with timer.phase("environment"):
+            o = self.info(task, start)
+            o["energiBridgeCmd"] = session.argv
+            env = self.environment(task)
+        print(f"[TASK {task.experiment.name} - {task.id}] started at {start}", end=' ')
+        begin = time.time()
+        process = None
+        try:
+            with open(task.log_output_path, "w") as log:
+                with timer.phase("spawn"):
+                    process = self.launch_workload(task, env, log, o)
+                if process is not None:
+                    with timer.phase("workload"):
+                        try:
+                            process.wait(timeout=task.experiment.max_execution or None)
+                        except subprocess.TimeoutExpired:
+                            process.kill()
+                            process.wait()
+        finally:
+            end = time.time()
+            print(f"DONE in {datetime.datetime.now() - start}")
+            o["endingTime"] = datetime.datetime.now().isoformat()
+            o["phases"] = timer.phases
+            if process is not None:
+                o["launchLatency"] = timer.phases["spawn"]
+                session.mark(task, begin, end, o)
+            else:
+                # Without a marker no measurements are split off, so the run stays incomplete for --resume
+                with open(task.info_output_path, "w") as f:
+                    json.dump(o, f, indent=4)
+            if getattr(self.settings, "metrics", None):
+                record_task(self.settings.metrics, task, getattr(self.settings, "campaign", None))
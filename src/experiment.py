@@ -1,4 +1,5 @@
 import os
+from itertools import product
 from sys import platform
 
 from yaml import load
@@ -9,32 +10,123 @@ except ImportError:
     from yaml import Loader
 
 EXPERIMENTS_DIR = os.path.join(os.path.dirname(__file__), "..", "experiments")
+MATRIX_PATH = os.path.join(EXPERIMENTS_DIR, "matrix.yml")
+COMMAND_KEYS = ["linux-cmd", "macos-cmd", "windows-cmd"]
+CONFIG_KEYS = ["name", "description", "enabled", "variables", "max_execution"] + COMMAND_KEYS
+
+# Loaded experiments by config path, with the mtime of the config they were loaded from
+_registry = {}
 
 
 def get_experiments():
     enabled = []
-    for experiment in os.listdir(EXPERIMENTS_DIR):
+    for experiment in sorted(os.listdir(EXPERIMENTS_DIR)):
         if os.path.isdir(os.path.join(EXPERIMENTS_DIR, experiment)):
-            e = Experiment(experiment)
+            e = load_experiment(experiment)
             if e.enabled:
                 enabled.append(e)
+    matrix = load_matrix()
+    if matrix is not None:
+        # An experiment directory overrides the matrix cell of the same name
+        enabled += [e for e in matrix.experiments()
+                    if e.enabled and not os.path.isdir(os.path.join(EXPERIMENTS_DIR, e.name))]
     return enabled
 
 
+def load_experiment(name):
+    """Returns the experiment, parsing and validating its config.yml only if it changed since the last load.
+
+    Experiments without their own directory are looked up in the matrix.
+    """
+    path_config = os.path.join(EXPERIMENTS_DIR, name, "config.yml")
+    if not os.path.exists(path_config):
+        matrix = load_matrix()
+        experiment = matrix.experiment(name) if matrix is not None else None
+        if experiment is not None:
+            return experiment
+    mtime = os.path.getmtime(path_config) if os.path.exists(path_config) else None
+    cached = _registry.get(path_config)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    experiment = Experiment(name)
+    _registry[path_config] = (mtime, experiment)
+    return experiment
+
+
+def load_matrix(path=MATRIX_PATH):
+    """Returns the Matrix of experiments/matrix.yml, or None if there is none. Reloaded only when it changed."""
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _registry.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, Matrix(path))
+        _registry[path] = cached
+    return cached[1]
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def validate(data, path):
+    """Raises a ValueError describing everything that is wrong with an experiment config."""
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid experiment config {path}: expected a mapping")
+    errors = [f"unknown key '{key}'" for key in data if key not in CONFIG_KEYS]
+    if not isinstance(data.get("name"), str):
+        errors.append("'name' must be a string")
+    if not isinstance(data.get("enabled", False), bool):
+        errors.append("'enabled' must be true or false")
+    if not isinstance(data.get("description", ""), str):
+        errors.append("'description' must be a string")
+    max_execution = data.get("max_execution", 0)
+    if not isinstance(max_execution, int) or isinstance(max_execution, bool) or max_execution < 0:
+        errors.append("'max_execution' must be a non-negative integer")
+    variables = data.get("variables", {})
+    if not isinstance(variables, dict) or not all(_is_scalar(v) for v in variables.values()):
+        errors.append("'variables' must map names to strings or numbers")
+    if not any(key in data for key in COMMAND_KEYS):
+        errors.append(f"at least one of {', '.join(COMMAND_KEYS)} is required")
+    for key in COMMAND_KEYS:
+        cmd = data.get(key)
+        if cmd is not None and not isinstance(cmd, str) and not (
+                isinstance(cmd, list) and cmd and all(_is_scalar(arg) for arg in cmd)):
+            errors.append(f"'{key}' must be a string or a non-empty list of arguments")
+    if errors:
+        raise ValueError(f"Invalid experiment config {path}: " + "; ".join(errors))
+
+
 class Experiment:
     def __init__(self, name):
         self.name = name
         self.path = (os.path.join(EXPERIMENTS_DIR, name))
         self._data = None
+        self._command = None
 
         self._load()
 
+    @classmethod
+    def from_config(cls, name, data, source):
+        """Creates an experiment from an already loaded config; `source` names where it came from in errors."""
+        experiment = cls.__new__(cls)
+        experiment.name = name
+        experiment.path = os.path.join(EXPERIMENTS_DIR, name)
+        experiment._set_data(data, source)
+        return experiment
+
     def _load(self):
         path_config = os.path.join(self.path, "config.yml")
         if not os.path.exists(path_config):
             return
         with open(path_config, 'r') as f:
-            self._data = load(f, Loader=Loader)
+            self._set_data(load(f, Loader=Loader), path_config)
+
+    def _set_data(self, data, source):
+        validate(data, source)
+        self._data = data
+        # Resolved once here instead of on every access
+        self._command = self._resolve_command()
 
     @property
     def max_execution(self):
@@ -50,8 +142,18 @@ class Experiment:
 
     @property
     def command(self):
-        if self._data is None:
-            return None
+        """The command of this platform: a string run through a shell, or an argv list that is executed directly."""
+        return self._command
+
+    def _resolve_arg(self, arg):
+        arg = str(arg)
+        for var in self._data.get("variables", []):
+            arg = arg.replace(f"${var}", str(self._data["variables"][var]))
+        if arg.startswith("./") or arg.startswith(".\\"):
+            return self.path + arg[1:]
+        return arg
+
+    def _resolve_command(self):
         cmd = None
 
         if platform == "linux" or platform == "linux2":
@@ -60,10 +162,101 @@ class Experiment:
             cmd = self._data.get("macos-cmd", None)
         elif platform == "win32":
             cmd = self._data.get("windows-cmd", None)
+        if cmd is None:
+            return None
+        if isinstance(cmd, list):
+            return [self._resolve_arg(arg) for arg in cmd]
 
         for var in self._data.get("variables", []):
             cmd = cmd.replace(f"${var}", str(self._data["variables"][var]))
         cmd = cmd.replace(" ./", " " + self.path + "/").replace(" .\\", " " + self.path + "\\")
         if cmd.startswith("./") or cmd.startswith(".\\"):
             return self.path + cmd[1:]
-        return cmd
\ No newline at end of file
+        return cmd
+
+
+def _format(value, context):
+    if isinstance(value, str):
+        return value.format(**context)
+    if isinstance(value, list):
+        return [_format(v, context) for v in value]
+    if isinstance(value, dict):
+        return {k: _format(v, context) for k, v in value.items()}
+    return value
+
+
+class Matrix:
+    """A declarative experiment matrix: the product of a set of axes applied to one config template.
+
+    Every string in the template may refer to the value of an axis ({resolution}) or to the variables an axis
+    value defines under `values`. Experiments are only created when they are asked for. `group_by` lists the
+    axes whose combinations are run as separate groups, `interleave` the order of the runs within a group (see
+    src/runner.py) and `inputs` the converter.py video (resolution and codec) each cell decodes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r') as f:
+            spec = load(f, Loader=Loader)
+        if not isinstance(spec, dict) or not isinstance(spec.get("axes"), dict) or not spec["axes"]:
+            raise ValueError(f"Invalid experiment matrix {path}: 'axes' must map axis names to lists of values")
+        self.axes = {axis: list(values) for axis, values in spec["axes"].items()}
+        self.values = spec.get("values", {})
+        self.group_by = spec.get("group_by", [])
+        self.interleave = spec.get("interleave", "shuffle")
+        self.inputs_template = spec.get("inputs")
+        self.template = {key: spec[key] for key in CONFIG_KEYS if key in spec}
+        unknown = [axis for axis in self.group_by if axis not in self.axes]
+        if unknown:
+            raise ValueError(f"Invalid experiment matrix {path}: unknown group_by axes {', '.join(unknown)}")
+        self._names = None
+        self._experiments = {}
+
+    def cells(self):
+        for combination in product(*self.axes.values()):
+            yield dict(zip(self.axes, combination))
+
+    def context(self, cell):
+        context = dict(cell)
+        for axis, value in cell.items():
+            context.update(self.values.get(axis, {}).get(value, {}))
+        return context
+
+    def name(self, cell):
+        return self.template["name"].format(**self.context(cell))
+
+    def experiment_for(self, cell):
+        name = self.name(cell)
+        if name not in self._experiments:
+            data = _format(self.template, self.context(cell))
+            self._experiments[name] = Experiment.from_config(name, data, f"{self.path} ({name})")
+        return self._experiments[name]
+
+    def experiments(self):
+        for cell in self.cells():
+            yield self.experiment_for(cell)
+
+    def experiment(self, name):
+        if self._names is None:
+            self._names = {self.name(cell): cell for cell in self.cells()}
+        cell = self._names.get(name)
+        return self.experiment_for(cell) if cell is not None else None
+
+    def groups(self):
+        """Returns [(group name, [experiment names])] with one group per combination of the group_by axes."""
+        groups = {}
+        for cell in self.cells():
+            key = "_".join(str(cell[axis]) for axis in self.group_by) or "all"
+            groups.setdefault(key, []).append(self.name(cell))
+        return list(groups.items())
+
+    def inputs(self):
+        """Returns the (resolution, codec) videos converter.py has to create for this matrix."""
+        if self.inputs_template is None:
+            return []
+        inputs = []
+        for cell in self.cells():
+            video = _format(self.inputs_template, self.context(cell))
+            if (int(video["resolution"]), video["codec"]) not in inputs:
+                inputs.append((int(video["resolution"]), video["codec"]))
+        return inputs
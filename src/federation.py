@@ -0,0 +1,106 @@
+import os, json, csv, glob
+
+import pandas as pd
+
+from src.analysis import load_runs, analyze_all
+from src.measurements import energy_column, power_column
+from src.store import find_measurement_dirs
+
+HOST_COLUMNS = ["host", "cpu", "cores", "interval", "energy_source"]
+# Whether the workload was started through a shell wrapper (a string command) instead of as an argv list
+RUN_COLUMNS = HOST_COLUMNS + ["wrapped"]
+
+
+def schema(file):
+    """The sensor columns of one measurement CSV: the energy counter (or power column) and the core count."""
+    with open(file, "r", newline="") as f:
+        header = next(csv.reader(f), [])
+    return {
+        "energy_source": energy_column(header) or power_column(header),
+        "cores": sum(1 for column in header if column.startswith("CPU_USAGE_")) or None,
+    }
+
+
+def run_metadata(person, measurements_dir):
+    """Host metadata of every run of one experiment, keyed by run.
+
+    The info file written by EnergiBridge.run describes the host; results measured before it did fall back to
+    the contributor as host and to the sensor columns of the CSV. Those results were all measured through the
+    PowerShell wrapper.
+    """
+    files = sorted(glob.glob(os.path.join(measurements_dir, "*.csv")))
+    if not files:
+        return {}
+    defaults = {"host": person, "cpu": None, "interval": None, "wrapped": True, **schema(files[0])}
+    metadata = {}
+    for file in files:
+        run = os.path.splitext(os.path.basename(file))[0]
+        info_path = os.path.join(os.path.dirname(measurements_dir), "info", f"{run}.json")
+        row = dict(defaults)
+        if os.path.exists(info_path):
+            with open(info_path, "r") as f:
+                info = json.load(f)
+            host = info.get("hostInfo", {})
+            row["host"] = info.get("host") or row["host"]
+            row["interval"] = info.get("interval")
+            row["cpu"] = host.get("cpu")
+            row["cores"] = host.get("cores") or row["cores"]
+            row["wrapped"] = not isinstance(info.get("taskCmd"), list)
+        metadata[run] = row
+    return metadata
+
+
+def load_federated(base_dir, cache=None, workers=None):
+    """load_runs of every contributor tree in base_dir, with the host metadata of each run.
+
+    Energy counters of different machines (CPU_ENERGY, PACKAGE_ENERGY) are harmonized into total_energy;
+    energy_source records which one a run was measured with.
+    """
+    runs = load_runs(base_dir, cache, workers)
+    metadata = {}
+    for person, resolution, experiment, measurements_dir in find_measurement_dirs(base_dir):
+        for run, row in run_metadata(person, measurements_dir).items():
+            metadata[(person, resolution, experiment, run)] = row
+    keys = zip(runs["person"], runs["resolution"], runs["experiment"], runs["run"])
+    hosts = pd.DataFrame([metadata.get(key, {}) for key in keys], columns=RUN_COLUMNS, index=runs.index)
+    return pd.concat([runs, hosts], axis=1)
+
+
+def normalize(runs, value="total_energy", reference=None):
+    """Adds normalized_<value>: every run relative to the median of its host and resolution.
+
+    With a reference codec only the runs of that codec set the median, so the reference is ~1 on every host.
+    """
+    base = runs if reference is None else runs[runs["codec"] == reference]
+    medians = base.groupby(["host", "resolution"])[value].median().rename("median")
+    runs = runs.join(medians, on=["host", "resolution"])
+    runs[f"normalized_{value}"] = runs[value] / runs.pop("median")
+    return runs
+
+
+def analyze_federated(runs, value="total_energy", reference=None, alpha=0.05, z_threshold=3, **resampling):
+    """Analyses the runs of every host separately, and pooled over all hosts, in one pass.
+
+    The pooled analysis uses the raw values and the per-host normalized values. The scope column tells the
+    analyses apart; for the host scope the person column holds the host.
+    """
+    runs = normalize(runs, value, reference)
+    scopes = {
+        "host": runs.assign(person=runs["host"]),
+        "pooled": runs.assign(person="all"),
+        "normalized": runs.assign(person="all", **{value: runs[f"normalized_{value}"]}),
+    }
+    frames = []
+    for scope, data in scopes.items():
+        results = analyze_all(data, alpha, z_threshold, value, **resampling)
+        results.insert(0, "scope", scope)
+        frames.append(results)
+    return pd.concat(frames, ignore_index=True)
+
+
+def host_summary(runs):
+    """One row per host with its sensor schema and number of runs."""
+    return (runs.groupby("host", dropna=False)
+            .agg(persons=("person", lambda p: ", ".join(sorted(set(p)))), cpu=("cpu", "first"),
+                 cores=("cores", "first"), energy_source=("energy_source", "first"), runs=("run", "size"))
+            .reset_index())
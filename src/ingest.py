@@ -0,0 +1,75 @@
+import os, math
+from concurrent.futures import ProcessPoolExecutor
+
+from src.measurements import summarize_run
+
+MAX_WORKERS = 32
+
+
+class IngestError:
+    def __init__(self, file, message):
+        self.file = file
+        self.message = message
+
+    def __str__(self):
+        return f"{self.file}: {self.message}"
+
+
+def _summarize_chunk(summarize, files):
+    results = []
+    for file in files:
+        try:
+            results.append((summarize(file), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def ingest_files(files, workers=None, chunksize=None, cache=None, summarize=None):
+    """Summarizes measurement CSVs on a process pool.
+
+    Returns the summaries in the order of `files` and a list of IngestError for the files that could not be
+    summarized. Files that are unchanged in `cache` (a SummaryCache, see SummaryCache.lookup) are not read
+    again. `summarize` defaults to the function of the cache, or summarize_run without one.
+    """
+    if summarize is None:
+        summarize = cache.summarize if cache is not None else summarize_run
+    elif cache is not None and summarize is not cache.summarize:
+        raise ValueError(f"Cache {cache.path} holds summaries of {cache.summarize.__name__}, not {summarize.__name__}")
+    files = list(files)
+    summaries = [None] * len(files)
+    todo = []
+    for index, file in enumerate(files):
+        summary = cache.lookup(file) if cache is not None else None
+        if summary is None:
+            todo.append(index)
+        else:
+            summaries[index] = summary
+
+    if workers is None:
+        workers = min(MAX_WORKERS, os.cpu_count() or 1)
+    if chunksize is None:
+        # A few chunks per worker keeps the pool busy without pickling every small file separately
+        chunksize = max(1, math.ceil(len(todo) / (workers * 4)))
+    chunks = _chunks(todo, chunksize)
+
+    if workers <= 1 or len(chunks) <= 1:
+        results = [_summarize_chunk(summarize, [files[i] for i in chunk]) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(_summarize_chunk, [summarize] * len(chunks), [[files[i] for i in chunk] for chunk in chunks]))
+
+    errors = []
+    for chunk, chunk_results in zip(chunks, results):
+        for index, (summary, error) in zip(chunk, chunk_results):
+            if error is not None:
+                errors.append(IngestError(files[index], error))
+                continue
+            summaries[index] = summary
+            if cache is not None:
+                cache.store(files[index], summary)
+    return summaries, errors
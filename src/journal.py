@@ -0,0 +1,71 @@
+import os, json
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+def task_complete(task):
+    """A task is complete if its info file was finalized and its measurements hold at least one sample."""
+    try:
+        with open(task.info_output_path, "r") as f:
+            if "endingTime" not in json.load(f):
+                return False
+        with open(task.measurements_output_path, "r") as f:
+            return f.readline() != "" and f.readline().strip() != ""
+    except (OSError, ValueError):
+        return False
+
+
+class Journal:
+    """Append-only record of the shuffled task plan of every group and of the tasks that completed.
+
+    Every record is one JSON line that is flushed to disk before the campaign continues, so a crashed
+    campaign can be resumed from its output directory.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, JOURNAL_FILE)
+        self._plans = {}
+        self._done = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The last line may be cut off by the crash
+                        continue
+                    if record["type"] == "plan":
+                        self._plans[record["group"]] = record
+                    elif record["type"] == "done":
+                        self._done.setdefault(record["group"], set()).add(record["id"])
+
+    def group(self, output):
+        return os.path.relpath(output, self.directory).replace(os.sep, "/")
+
+    def _append(self, record):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def plan(self, group):
+        """Returns the recorded (seed, [(task id, experiment name)]) of a group, or None."""
+        record = self._plans.get(group)
+        if record is None:
+            return None
+        return record["seed"], [(task["id"], task["experiment"]) for task in record["tasks"]]
+
+    def record_plan(self, group, seed, tasks):
+        record = {"type": "plan", "group": group, "seed": seed,
+                  "tasks": [{"id": task.id, "experiment": task.experiment.name} for task in tasks]}
+        self._plans[group] = record
+        self._append(record)
+
+    def is_done(self, group, task_id):
+        return task_id in self._done.get(group, ())
+
+    def record_done(self, group, task_id):
+        self._done.setdefault(group, set()).add(task_id)
+        self._append({"type": "done", "group": group, "id": task_id})
@@ -0,0 +1,164 @@
+import os, csv, math, threading, time
+
+from src.measurements import energy_column
+
+
+class OnlineStats:
+    """Running count, mean, variance, min and max of a stream of values (Welford), in constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self):
+        if self.count == 0:
+            return {"count": 0}
+        return {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+
+
+class LiveMonitor:
+    """Tails a measurement CSV while EnergiBridge writes it and aggregates every sample as it arrives.
+
+    Anomalies (no energy column, counter resets, throttling, no energy used) are printed as soon as they are
+    detected and listed in the summary.
+    """
+
+    def __init__(self, path, poll=0.1, throttle_ratio=0.5, throttle_fraction=0.1):
+        self.path = path
+        self.poll = poll
+        self.throttle_ratio = throttle_ratio
+        self.throttle_fraction = throttle_fraction
+        self.anomalies = []
+        self.samples = 0
+        self.power = OnlineStats()
+        self.frequency = {}
+        self.usage = {}
+        self._header = None
+        self._energy = None
+        self._first = None
+        self._previous = None
+        self._energy_total = 0.0
+        self._peak_frequency = 0.0
+        self._throttled = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._tail, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Reads the remaining samples once the run has finished and returns the summary."""
+        self._stop.set()
+        self._thread.join()
+        if self._header is None:
+            self._flag("no_samples", "no measurements were written")
+        elif self.samples > 0 and self._energy is not None and self._energy_total <= 0:
+            self._flag("no_energy", f"total energy is {self._energy_total:.4f} J")
+        if self.samples > 0 and self._throttled > self.throttle_fraction * self.samples:
+            self._flag("throttling", f"{self._throttled} of {self.samples} samples below "
+                                     f"{self.throttle_ratio:.0%} of the peak frequency")
+        return self.summary()
+
+    def _flag(self, kind, message):
+        if kind not in [a["type"] for a in self.anomalies]:
+            print(f"\n[LIVE] {os.path.basename(self.path)}: {message}")
+            self.anomalies.append({"type": kind, "message": message})
+
+    def _tail(self):
+        while not os.path.exists(self.path):
+            if self._stop.is_set():
+                return
+            time.sleep(self.poll)
+        with open(self.path, "r", newline="") as f:
+            buffer = ""
+            while True:
+                stopping = self._stop.is_set()
+                chunk = f.readline()
+                if chunk:
+                    buffer += chunk
+                    if buffer.endswith("\n") or stopping:
+                        self._line(buffer)
+                        buffer = ""
+                    continue
+                if stopping:
+                    if buffer:
+                        self._line(buffer)
+                    return
+                time.sleep(self.poll)
+
+    def _line(self, line):
+        if not line.strip():
+            return
+        values = next(csv.reader([line]))
+        if self._header is None:
+            self._header = values
+            self._energy = energy_column(values)
+            if self._energy is None:
+                self._flag("no_energy_column", "energy column not found")
+            return
+        try:
+            row = {column: float(value) for column, value in zip(self._header, values)}
+        except ValueError:
+            return
+        self._sample(row)
+
+    def _sample(self, row):
+        self.samples += 1
+        frequencies = []
+        for column, value in row.items():
+            if column.startswith("CPU_FREQUENCY_"):
+                self.frequency.setdefault(column, OnlineStats()).add(value)
+                frequencies.append(value)
+            elif column.startswith("CPU_USAGE_"):
+                self.usage.setdefault(column, OnlineStats()).add(value)
+        if frequencies:
+            mean_frequency = sum(frequencies) / len(frequencies)
+            self._peak_frequency = max(self._peak_frequency, mean_frequency)
+            if mean_frequency < self.throttle_ratio * self._peak_frequency:
+                self._throttled += 1
+
+        if self._energy is None or self._energy not in row:
+            return
+        if self._first is None:
+            self._first = row
+        elif self._previous is not None:
+            delta = row[self._energy] - self._previous[self._energy]
+            seconds = (row["Time"] - self._previous["Time"]) / 1e3
+            if delta < 0:
+                self._flag("counter_reset", f"{self._energy} went back by {-delta:.4f} J")
+                # Bridge the broken step with the mean power seen so far, like measurements.correct_deltas
+                if seconds > 0:
+                    self._energy_total += self.power.mean * seconds
+            else:
+                self._energy_total += delta
+                if seconds > 0:
+                    self.power.add(delta / seconds)
+        self._previous = row
+
+    def summary(self):
+        duration = (self._previous["Time"] - self._first["Time"]) / 1e3 if self._first and self._previous else 0.0
+        return {
+            "samples": self.samples,
+            "duration": duration,
+            "total_energy": self._energy_total,
+            "power": self.power.to_dict(),
+            "frequency": {column: stats.to_dict() for column, stats in sorted(self.frequency.items())},
+            "usage": {column: stats.to_dict() for column, stats in sorted(self.usage.items())},
+            "anomalies": self.anomalies,
+        }
@@ -0,0 +1,137 @@
+import os, csv, io
+
+import numpy as np
+import pandas as pd
+
+ENERGY_COLUMNS = ["PACKAGE_ENERGY (J)", "CPU_ENERGY (J)"]
+POWER_COLUMNS = ["SYSTEM_POWER (Watts)", "CPU_POWER (Watts)", "PACKAGE_POWER (W)", "CPU_POWER (W)"]
+
+
+def energy_column(columns):
+    for column in ENERGY_COLUMNS:
+        if column in columns:
+            return column
+    return None
+
+
+def power_column(columns):
+    for column in POWER_COLUMNS:
+        if column in columns:
+            return column
+    return None
+
+
+def correct_deltas(deltas, intervals=None, wrap=None):
+    """Corrects the negative steps of a cumulative counter, which are wraps or resets.
+
+    With a known `wrap` range the counter is unwrapped. Otherwise the energy of a broken step is estimated from
+    the median power of the valid steps and the step's interval (or the median step without intervals).
+    Works on the steps of a single run as well as on a 2D (runs, steps) matrix padded with NaN.
+    """
+    deltas = np.array(deltas, dtype=np.float64)
+    broken = deltas < 0
+    if not broken.any():
+        return deltas
+    if wrap is not None:
+        deltas[broken] += wrap
+        return deltas
+    valid = np.where(broken, np.nan, deltas)
+    if intervals is None:
+        estimate = np.nanmedian(valid, axis=-1, keepdims=True) * np.ones_like(deltas)
+    else:
+        intervals = np.asarray(intervals, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.nanmedian(np.where(intervals > 0, valid / intervals, np.nan), axis=-1, keepdims=True)
+        estimate = rate * intervals
+    deltas[broken] = np.nan_to_num(estimate[broken])
+    return deltas
+
+
+def integrate_energy(values, intervals=None, wrap=None):
+    """Total energy of a cumulative energy counter, robust against wraps and resets.
+
+    `intervals` are the times between the samples, i.e. the Delta column without its first row.
+    """
+    return float(np.nansum(correct_deltas(np.diff(np.asarray(values, dtype=np.float64)), intervals, wrap)))
+
+
+def energy_from_power(power, delta):
+    """Integrates a power column (W) over the Delta column (ms since the previous sample) to energy in J."""
+    power, delta = np.asarray(power, dtype=np.float64), np.asarray(delta, dtype=np.float64)
+    return float(np.sum(power[1:] * delta[1:]) / 1e3)
+
+
+def summarize_run(file, wrap=None):
+    """Computes the per-run summary of one EnergiBridge measurement CSV."""
+    data = pd.read_csv(file)
+    column = energy_column(data.columns)
+    intervals = data["Delta"].to_numpy()[1:] if "Delta" in data.columns else None
+    if column is not None:
+        total_energy = integrate_energy(data[column].to_numpy(), intervals, wrap)
+    elif power_column(data.columns) is not None and "Delta" in data.columns:
+        total_energy = energy_from_power(data[power_column(data.columns)], data["Delta"])
+    else:
+        raise ValueError(f"Energy column not found in {file}. Please check the column names.")
+
+    # EnergiBridge writes Time as milliseconds since the epoch
+    duration = float(data["Time"].iloc[-1] - data["Time"].iloc[0]) / 1e3
+    frequency_columns = [c for c in data.columns if c.startswith("CPU_FREQUENCY_")]
+    return {
+        "run": os.path.splitext(os.path.basename(file))[0],
+        "total_energy": total_energy,
+        "duration": duration,
+        "mean_power": total_energy / duration if duration > 0 else float("nan"),
+        "peak_frequency": float(data[frequency_columns].to_numpy().max()) if frequency_columns else float("nan"),
+    }
+
+
+def _last_line(f, size):
+    block = 4096
+    while True:
+        start = max(0, size - block)
+        f.seek(start)
+        lines = f.read(size - start).rstrip(b"\r\n").splitlines()
+        if len(lines) > 1 or start == 0:
+            return lines[-1]
+        block *= 2
+
+
+def read_first_last(file):
+    """Reads only the header, the first and the last row of a measurement CSV.
+
+    The last row is found by seeking back from the end of the file, so the cost does not grow with the
+    number of samples.
+    """
+    with open(file, "rb") as f:
+        header = f.readline()
+        first = f.readline()
+        if not first.strip():
+            raise ValueError(f"No measurements in {file}")
+        last = _last_line(f, os.fstat(f.fileno()).st_size)
+    header, first, last = (next(csv.reader(io.StringIO(line.decode()))) for line in (header, first, last))
+    return header, dict(zip(header, first)), dict(zip(header, last))
+
+
+def summarize_energy(file):
+    """Like summarize_run, but only reads the energy column and the first and last row, so the peak
+    frequency is left out."""
+    header, first, last = read_first_last(file)
+    column = energy_column(header)
+    if column is None:
+        raise ValueError(f"Energy column not found in {file}. Please check the column names.")
+
+    total_energy = float(last[column]) - float(first[column])
+    energy = pd.read_csv(file, usecols=[column], dtype=np.float64)[column].to_numpy()
+    if (np.diff(energy) < 0).any():
+        # The counter wrapped or was reset during the run, even if it ended above its start, which only the
+        # full trace can correct
+        summary = summarize_run(file)
+        del summary["peak_frequency"]
+        return summary
+    duration = (float(last["Time"]) - float(first["Time"])) / 1e3
+    return {
+        "run": os.path.splitext(os.path.basename(file))[0],
+        "total_energy": total_energy,
+        "duration": duration,
+        "mean_power": total_energy / duration if duration > 0 else float("nan"),
+    }
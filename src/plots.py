@@ -0,0 +1,152 @@
+import os, json, hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import seaborn as sns
+import scipy.stats as stats
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Bump when the look of the plots changes, so cached plots are rendered again
+PLOT_VERSION = 1
+MANIFEST = ".plots.json"
+
+BOX_STYLE = dict(width=0.3, boxprops={'zorder': 2, 'facecolor': 'none'}, showcaps=True,
+                 whiskerprops={'linewidth': 2}, medianprops={'color': 'red'},
+                 flierprops={'marker': 'o', 'color': 'black', 'alpha': 0.5})
+
+
+def _figure(figsize):
+    # Figures are not registered with pyplot, so they need no GUI backend and are freed once unreferenced
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure, figure.add_subplot()
+
+
+def violin_box_figure(values, title):
+    figure, ax = _figure((10, 6))
+    sns.violinplot(y=values, inner=None, color="lightblue", linewidth=1, ax=ax)
+    sns.boxplot(y=values, ax=ax, **BOX_STYLE)
+    sns.stripplot(y=values, color="black", alpha=0.3, size=4, ax=ax)
+    ax.set_ylabel("Total Energy (J)")
+    ax.set_title(f"Violin + Box Plot of Total Energy per Test ({title})")
+    ax.grid(True)
+    return figure
+
+
+def combined_violin_box_figure(values, title):
+    """values maps each label to the total energies of that experiment."""
+    labels = [label for label, v in values.items() for _ in v]
+    energies = np.concatenate([np.asarray(v, dtype=float) for v in values.values()])
+    figure, ax = _figure((10, 10))
+    sns.violinplot(x=labels, y=energies, inner=None, linewidth=1, ax=ax)
+    sns.boxplot(x=labels, y=energies, ax=ax, **BOX_STYLE)
+    sns.stripplot(x=labels, y=energies, color="black", alpha=0.3, size=4, ax=ax)
+    ax.set_ylabel("Total Energy (J)")
+    ax.set_title(f"Combined Violin + Box Plot of Total Energy per Test {title}")
+    ax.grid(True)
+    return figure
+
+
+def histogram_figure(values, title):
+    figure, ax = _figure((10, 6))
+    sns.histplot(values, color="blue", kde=True, bins=20, alpha=0.5, ax=ax)
+    ax.set_xlabel("Total Energy (J)")
+    ax.set_ylabel("Time")
+    ax.set_title(f"Histogram of Total Energy ({title})")
+    ax.grid(True)
+    return figure
+
+
+def qq_figure(values, title):
+    figure, ax = _figure((6, 6))
+    stats.probplot(values, dist="norm", plot=ax)
+    ax.set_title(f"QQ Plot of Total Energy ({title})")
+    ax.grid(True)
+    return figure
+
+
+FIGURES = {
+    "violin_box": violin_box_figure,
+    "combined_violin_box": combined_violin_box_figure,
+    "histogram": histogram_figure,
+    "qq": qq_figure,
+}
+
+
+class PlotJob:
+    def __init__(self, kind, path, title, values):
+        self.kind = kind
+        self.path = path
+        self.title = title
+        self.values = values
+
+    @property
+    def digest(self):
+        h = hashlib.sha256(f"{PLOT_VERSION}|{self.kind}|{self.title}".encode())
+        values = self.values if isinstance(self.values, dict) else {"": self.values}
+        for label, v in values.items():
+            h.update(label.encode())
+            h.update(np.asarray(v, dtype=np.float64).tobytes())
+        return h.hexdigest()
+
+    def render(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        FIGURES[self.kind](self.values, self.title).savefig(self.path)
+        return self.path
+
+
+def _render(job):
+    return job.render()
+
+
+def render_all(jobs, manifest_dir, workers=None):
+    """Renders the jobs on a process pool, skipping plots whose data did not change since the last render.
+
+    The data hash of every rendered plot is kept in a manifest file in manifest_dir. Returns the rendered paths.
+    """
+    manifest_path = os.path.join(manifest_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+
+    todo = [job for job in jobs if not (os.path.exists(job.path) and manifest.get(job.path) == job.digest)]
+    if workers == 1 or len(todo) <= 1:
+        rendered = [job.render() for job in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render, todo, chunksize=4))
+
+    for job in todo:
+        manifest[job.path] = job.digest
+    os.makedirs(manifest_dir, exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=4)
+    return rendered
+
+
+def report_jobs(runs, output_root=".", z_threshold=3):
+    """Creates the plot jobs of the <person>_graphs/<resolution> tree for every person and resolution in runs.
+
+    runs is a long-form table as returned by src.analysis.load_runs.
+    """
+    jobs = []
+    for (person, resolution), group in runs.groupby(["person", "resolution"], sort=True):
+        output_dir = os.path.join(output_root, f"{person}_graphs", resolution)
+        raw, filtered = {}, {}
+        for experiment, values in group.groupby("experiment", sort=True)["total_energy"]:
+            values = values.to_numpy(dtype=float)
+            kept = values[np.abs(stats.zscore(values)) < z_threshold]
+            raw[experiment], filtered[experiment] = values, kept
+            for name, v in [(experiment, values), (f"{experiment}_filtered", kept)]:
+                jobs.append(PlotJob("violin_box", os.path.join(output_dir, f"{person}_violin_box_{name}.png"), name, v))
+                jobs.append(PlotJob("histogram", os.path.join(output_dir, f"histogram_total_energy_{name}.png"), name, v))
+                jobs.append(PlotJob("qq", os.path.join(output_dir, f"qqplot_{name}.png"), name, v))
+
+        experiment = "_".join(next(iter(raw)).split("_")[:-1])
+        for name, values in [(experiment, raw), (experiment + " filtered results", filtered)]:
+            labels = {e.split("_")[-1].upper(): v for e, v in values.items()}
+            jobs.append(PlotJob("combined_violin_box",
+                                os.path.join(output_dir, f"{person}_combined_violin_box_{name}.png"), name, labels))
+    return jobs
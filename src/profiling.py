@@ -0,0 +1,133 @@
+import os, json, time, uuid, cProfile, pstats, tracemalloc
+from contextlib import contextmanager
+
+METRICS_FILE = "metrics.jsonl"
+SUMMARY_FILE = "metrics.json"
+PROFILE_FILE = "profile.prof"
+# Phases in which the harness is not working itself
+MEASUREMENT_PHASES = ["workload"]
+WAIT_PHASES = ["sleep", "cooldown", "group_wait"]
+
+
+class Timer:
+    """Accumulates the monotonic wall time of named phases.
+
+    Every phase is also kept as an interval of epoch seconds, so the phases of concurrent slots can be merged.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.phases = {}
+        self.intervals = {}
+
+    @contextmanager
+    def phase(self, name):
+        wall, start = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.add(name, seconds, (wall, wall + seconds))
+
+    def add(self, name, seconds, interval=None):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if interval is not None:
+            self.intervals.setdefault(name, []).append(interval)
+
+
+def covered(intervals):
+    """Total length of the union of (start, end) intervals."""
+    total, end = 0.0, None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            total, end = total + stop - start, stop
+        elif stop > end:
+            total, end = total + stop - end, stop
+    return total
+
+
+def record_task(path, task, campaign=None):
+    """Appends the phases of a finished task to the metrics file of the campaign as one JSON line."""
+    record = {"campaign": campaign, "experiment": task.experiment.name, "id": task.id, "attempt": task.attempt,
+              "slot": task.slot.index if task.slot is not None else None, "phases": task.timer.phases,
+              "intervals": task.timer.intervals}
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def summarize(path, wall_time=None, campaign=None):
+    """Totals the phases of the tasks in a metrics file, plus those of the campaign itself (like the waits
+    between groups), and splits the campaign time into measurement, waiting and harness overhead.
+
+    With a campaign Timer, only the tasks of that campaign count, so a resumed campaign does not add the runs
+    of the process before it. Measurement and waiting are the union of their intervals: while any slot
+    measures, the time counts as measurement once, and waiting is the remaining time some slot waits.
+    """
+    totals, intervals, records = {}, {}, []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    if campaign is not None:
+        records = [r for r in records if r.get("campaign") == campaign.id]
+    tasks = len(records)
+    if campaign is not None:
+        records.append({"phases": campaign.phases, "intervals": campaign.intervals})
+    for record in records:
+        for name, seconds in record["phases"].items():
+            totals[name] = totals.get(name, 0.0) + seconds
+        for name, spans in record.get("intervals", {}).items():
+            intervals.setdefault(name, []).extend(spans)
+
+    def spans(names):
+        return [span for name in names for span in intervals.get(name, [])]
+
+    measurement = covered(spans(MEASUREMENT_PHASES))
+    busy = covered(spans(MEASUREMENT_PHASES + WAIT_PHASES))
+    summary = {"tasks": tasks, "phases": totals, "measurement": measurement, "waiting": busy - measurement,
+               "harness": covered(spans(intervals)) - busy}
+    if wall_time is not None:
+        # Includes everything outside of the tasks as well, like loading the experiments
+        summary["wall_time"] = wall_time
+        summary["harness"] = max(0.0, wall_time - busy)
+        summary["measurement_share"] = measurement / wall_time if wall_time > 0 else None
+    return summary
+
+
+@contextmanager
+def campaign(directory, profile=False, trace_memory=False):
+    """Profiles a whole campaign and writes its metrics summary (and profile) into directory at the end.
+
+    Yields a Timer for the phases of the campaign outside of the tasks; its id tags the records of the tasks.
+    With profile, cProfile covers the harness in this process; with trace_memory, tracemalloc records the peak
+    and the largest allocations of Python memory.
+    """
+    timer = Timer()
+    profiler = cProfile.Profile() if profile else None
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield timer
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        summary = summarize(os.path.join(directory, METRICS_FILE), time.perf_counter() - start, timer)
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            summary["memory_peak"] = tracemalloc.get_traced_memory()[1]
+            summary["memory_top"] = [{"location": str(stat.traceback), "size": stat.size}
+                                     for stat in snapshot.statistics("lineno")[:10]]
+            tracemalloc.stop()
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(directory, PROFILE_FILE))
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        with open(os.path.join(directory, SUMMARY_FILE), "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"Measurement {summary['measurement']:.1f} s, waiting {summary['waiting']:.1f} s and harness "
+              f"{summary['harness']:.1f} s of {summary['wall_time']:.1f} s.")
@@ -0,0 +1,100 @@
+import math
+from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+RESAMPLES = 10000
+CHUNKSIZE = 2000
+# Up to this many distinct splits the permutation test enumerates all of them instead of sampling
+MAX_EXACT = 100000
+
+
+def statistics(a, b):
+    """Mean difference, median difference, percent change of the mean and of the median of every row of a
+    against b."""
+    mean_a, mean_b = np.mean(a, axis=-1), np.mean(b, axis=-1)
+    median_a, median_b = np.median(a, axis=-1), np.median(b, axis=-1)
+    return {
+        "mean_diff": mean_a - mean_b,
+        "median_diff": median_a - median_b,
+        "percent_change": (mean_a - mean_b) / mean_a * 100,
+        # Like the median difference percentage of stat_analysis
+        "median_percent_change": 100 - median_a * 100 / median_b,
+    }
+
+
+def _bootstrap_chunk(a, b, size, seed):
+    rng = np.random.default_rng(seed)
+    # One row of indices per resample, drawn with replacement from each sample separately
+    index_a = rng.integers(0, len(a), (size, len(a)))
+    index_b = rng.integers(0, len(b), (size, len(b)))
+    return statistics(a[index_a], b[index_b])
+
+
+def _permutation_chunk(a, b, size, seed):
+    rng = np.random.default_rng(seed)
+    pooled = np.concatenate([a, b])
+    # Sorting random keys gives one independent permutation of the pooled sample per row
+    index = np.argsort(rng.random((size, len(pooled))), axis=1)
+    return statistics(pooled[index[:, :len(a)]], pooled[index[:, len(a):]])["mean_diff"]
+
+
+def _run_chunks(function, a, b, resamples, seed, chunksize, workers):
+    """Runs `resamples` resamples in chunks. Every chunk has its own seed, so the result does not depend on
+    the number of workers."""
+    sizes = [min(chunksize, resamples - start) for start in range(0, resamples, chunksize)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers is None or workers <= 1 or len(sizes) <= 1:
+        return [function(a, b, size, s) for size, s in zip(sizes, seeds)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+        return list(pool.map(function, [a] * len(sizes), [b] * len(sizes), sizes, seeds))
+
+
+def bootstrap(a, b, resamples=RESAMPLES, confidence=0.95, seed=0, chunksize=CHUNKSIZE, workers=None):
+    """Percentile bootstrap confidence intervals of every statistic of `statistics`.
+
+    Returns {statistic: (estimate, low, high)}.
+    """
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    chunks = _run_chunks(_bootstrap_chunk, a, b, resamples, seed, chunksize, workers)
+    estimates = statistics(a, b)
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for name, estimate in estimates.items():
+        low, high = np.percentile(np.concatenate([chunk[name] for chunk in chunks]), [tail, 100 - tail])
+        intervals[name] = (float(estimate), float(low), float(high))
+    return intervals
+
+
+def permutation_test(a, b, resamples=RESAMPLES, seed=0, chunksize=CHUNKSIZE, workers=None):
+    """Two-sided permutation test of the difference in means.
+
+    All splits of the pooled sample are enumerated when there are at most MAX_EXACT of them; otherwise
+    `resamples` random permutations are used. Returns (p-value, exact).
+    """
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    observed = abs(np.mean(a) - np.mean(b))
+    # Allow for floating point noise when comparing with the observed difference
+    tolerance = 1e-12 * max(1.0, observed)
+    if math.comb(len(a) + len(b), len(a)) <= MAX_EXACT:
+        pooled = np.concatenate([a, b])
+        first = np.array(list(combinations(range(len(pooled)), len(a))))
+        mask = np.zeros((len(first), len(pooled)), dtype=bool)
+        np.put_along_axis(mask, first, True, axis=1)
+        diffs = (mask @ pooled) / len(a) - (~mask @ pooled) / len(b)
+        return float(np.mean(np.abs(diffs) >= observed - tolerance)), True
+    diffs = np.concatenate(_run_chunks(_permutation_chunk, a, b, resamples, seed, chunksize, workers))
+    return float((np.sum(np.abs(diffs) >= observed - tolerance) + 1) / (len(diffs) + 1)), False
+
+
+def resample_pair(a, b, resamples=RESAMPLES, confidence=0.95, seed=0, workers=None):
+    """Bootstrap intervals and the permutation p-value of one pair as a flat dict. NaN values are dropped."""
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    a, b = a[~np.isnan(a)], b[~np.isnan(b)]
+    row = {}
+    for name, (estimate, low, high) in bootstrap(a, b, resamples, confidence, seed, workers=workers).items():
+        row[f"{name}_low"] = low
+        row[f"{name}_high"] = high
+    row["permutation_p"], row["permutation_exact"] = permutation_test(a, b, resamples, seed, workers=workers)
+    return row
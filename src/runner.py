@@ -1,24 +1,161 @@
-import random
+import random, os, json, datetime
 from time import sleep
-from src.energiBridge import Task
-from src.experiment import Experiment
+from src.energiBridge import Task, EnergiBridge
+from src.experiment import Experiment, load_experiment
+from src.journal import task_complete
+from src.measurements import summarize_energy
+from src.scheduler import make_slots, run_slots
+from src.session import SESSION_DIR, Session
+from src.sequential import check
 
-def generate_tasks(experiments: [Experiment], settings):
+def generate_tasks(experiments: [Experiment], settings, seed=None):
+    """Creates the tasks of a group in the order given by settings.interleave.
+
+    shuffle randomizes all runs, alternate runs one shuffled round of every experiment at a time, and blocked
+    runs all iterations of one experiment after the other, with the experiments in random order.
+    """
+    rng = random.Random(seed)
+    interleave = getattr(settings, "interleave", None) or "shuffle"
     tasks = []
     row = 0
     for experiment in experiments:
         for i in range(settings.iterations):
             tasks.append(Task(i + 1 + (row * settings.iterations), experiment, settings))
         row += 1
-    tasks.sort(key = lambda x: random.random())
-    warmup_experiment = Experiment("warmup")
+    if interleave == "shuffle":
+        tasks.sort(key = lambda x: rng.random())
+    elif interleave == "alternate":
+        rounds = [rng.random() for _ in tasks]
+        tasks.sort(key = lambda x: ((x.id - 1) % settings.iterations, rounds[x.id - 1]))
+    elif interleave == "blocked":
+        blocks = {experiment.name: rng.random() for experiment in experiments}
+        tasks.sort(key = lambda x: (blocks[x.experiment.name], x.id))
+    else:
+        raise ValueError(f"Unknown interleave: {interleave}")
+    warmup_experiment = load_experiment("warmup")
     if settings.warmup > 0:
         return [Task(-1, warmup_experiment, settings)] + tasks
     else:
         return tasks
 
-def run(experiments: [Experiment], settings):
-    tasks = generate_tasks(experiments, settings)
-    for task in tasks:
+def wait(task, settings, cooldown=None):
+    # Waits before a task, so the wait can be recorded in the task's info file
+    if cooldown is not None:
+        with task.timer.phase("cooldown"):
+            task.cooldown = cooldown.wait()
+    else:
+        with task.timer.phase("sleep"):
+            sleep(settings.sleep)
+        task.cooldown = settings.sleep
+
+def journaled_tasks(experiments: [Experiment], settings, journal):
+    """Returns the tasks of the group that still have to run, replaying the group's plan if one was recorded."""
+    group = journal.group(settings.output)
+    plan = journal.plan(group)
+    if plan is None:
+        seed = random.randrange(2 ** 32)
+        tasks = generate_tasks(experiments, settings, seed)
+        journal.record_plan(group, seed, tasks)
+        return tasks
+
+    by_name = {experiment.name: experiment for experiment in experiments}
+    tasks = [Task(id, by_name.get(name) or load_experiment(name), settings) for id, name in plan[1]]
+    remaining = [task for task in tasks if not (journal.is_done(group, task.id) and task_complete(task))]
+    print(f"Resuming {group}: {len(tasks) - len(remaining)} of {len(tasks)} tasks already completed.")
+    return remaining
+
+def run(experiments: [Experiment], settings, cooldown=None, journal=None):
+    """Runs the tasks of one group. Returns the number of tasks that were run."""
+    if getattr(settings, "sequential", False):
+        return run_sequential(experiments, settings, cooldown).get("runs", 0) * len(experiments)
+    if journal is not None:
+        tasks = journaled_tasks(experiments, settings, journal)
+    else:
+        tasks = generate_tasks(experiments, settings)
+    if getattr(settings, "batch", 0) > 1:
+        return run_batched(tasks, settings, cooldown, journal)
+    slots = getattr(settings, "slots", 1)
+    if slots > 1:
+        return run_slots(tasks, make_slots(slots, getattr(settings, "pin", False)), settings, journal)
+    index = 0
+    while index < len(tasks):
+        task = tasks[index]
+        if index > 0:
+            wait(task, settings, cooldown)
         task.run()
-        sleep(settings.sleep)
\ No newline at end of file
+        index += 1
+        if task.anomalies and task.attempt <= getattr(settings, "retries", 0):
+            # Measured again at the end of the group, replacing the anomalous run
+            retry = Task(task.id, task.experiment, settings)
+            retry.attempt = task.attempt + 1
+            tasks.append(retry)
+            print(f"Re-queued {task.experiment.name} - {task.id} (attempt {retry.attempt})")
+            continue
+        if journal is not None:
+            journal.record_done(journal.group(settings.output), task.id)
+    return len(tasks)
+
+def run_batched(tasks, settings, cooldown=None, journal=None):
+    """Runs the tasks in batches of settings.batch, each measured by one sampler session (see src/session.py).
+
+    The sampler is started once per batch instead of once per task; after a batch its trace is split into the
+    usual measurements and info files.
+    """
+    bridge = EnergiBridge(settings)
+    directory = os.path.join(settings.output, SESSION_DIR)
+    stamp = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+    for number, first in enumerate(range(0, len(tasks), settings.batch), start=1):
+        batch = tasks[first:first + settings.batch]
+        session = Session(bridge, directory, f"{stamp}-{number}")
+        with session:
+            for task in batch:
+                if task is not tasks[0]:
+                    wait(task, settings, cooldown)
+                task.run(session)
+        session.split()
+        if journal is not None:
+            for task in batch:
+                if task_complete(task):
+                    journal.record_done(journal.group(settings.output), task.id)
+    return len(tasks)
+
+def run_sequential(experiments: [Experiment], settings, cooldown=None):
+    """Runs the experiments in shuffled batches of one run each until the results are settled.
+
+    After every batch, from --min-iterations on, the runs so far are tested (see src/sequential.py). The group
+    stops early once settled, or continues past --iterations up to --max-iterations while it is not.
+    """
+    energies = {experiment.name: [] for experiment in experiments}
+    settled, result = False, {}
+    previous_runs = 0
+    first = True
+    if settings.warmup > 0:
+        Task(-1, load_experiment("warmup"), settings).run()
+        first = False
+    for i in range(settings.max_iterations):
+        batch = [Task(i + 1 + row * settings.max_iterations, experiment, settings)
+                 for row, experiment in enumerate(experiments)]
+        random.shuffle(batch)
+        for task in batch:
+            if not first:
+                wait(task, settings, cooldown)
+            first = False
+            task.run()
+            try:
+                energies[task.experiment.name].append(summarize_energy(task.measurements_output_path)["total_energy"])
+            except (OSError, ValueError) as e:
+                print(f"Run {task.id} of {task.experiment.name} is not used for stopping: {e}")
+
+        if i + 1 < settings.min_iterations:
+            continue
+        settled, result = check(energies, settings.iterations, settings.alpha, settings.precision,
+                                settings.max_iterations, previous_runs)
+        previous_runs = result["runs"]
+        print(f"After {i + 1} batches: {result}")
+        if settled:
+            break
+
+    result["settled"] = settled
+    with open(os.path.join(settings.output, "sequential.json"), "w") as f:
+        json.dump(result, f, indent=4)
+    return result
\ No newline at end of file
@@ -0,0 +1,209 @@
+import os, sys, csv, glob, time, argparse, subprocess
+
+import numpy as np
+import pandas as pd
+
+SAMPLERS = ["energibridge", "rapl", "synthetic"]
+POWERCAP_DIR = "/sys/class/powercap"
+TRACE_GLOB = os.path.join(os.path.dirname(__file__), "..", "final_results", "*", "*", "**", "measurements", "*.csv")
+MEMORY_COLUMNS = ["TOTAL_MEMORY", "TOTAL_SWAP", "USED_MEMORY", "USED_SWAP"]
+
+
+class SystemStats:
+    """Per-core frequency and usage and the memory use of a Linux host, in the columns of EnergiBridge."""
+
+    def __init__(self):
+        self.cores = os.cpu_count() or 1
+        self._previous = self._cpu_times()
+
+    def columns(self):
+        return ([f"CPU_FREQUENCY_{i}" for i in range(self.cores)] + [f"CPU_USAGE_{i}" for i in range(self.cores)])
+
+    def _cpu_times(self):
+        times = {}
+        if os.path.exists("/proc/stat"):
+            with open("/proc/stat", "r") as f:
+                for line in f:
+                    if line.startswith("cpu") and line[3].isdigit():
+                        name, *values = line.split()
+                        values = [int(v) for v in values]
+                        # idle and iowait
+                        times[int(name[3:])] = (values[3] + values[4], sum(values))
+        return times
+
+    def _frequency(self, core):
+        path = f"/sys/devices/system/cpu/cpu{core}/cpufreq/scaling_cur_freq"
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return int(f.read()) // 1000
+        return 0
+
+    def read(self):
+        times = self._cpu_times()
+        usage = []
+        for core in range(self.cores):
+            idle, total = times.get(core, (0, 0))
+            previous_idle, previous_total = self._previous.get(core, (0, 0))
+            elapsed = total - previous_total
+            usage.append(100 * (1 - (idle - previous_idle) / elapsed) if elapsed > 0 else 0.0)
+        self._previous = times
+        return [self._frequency(core) for core in range(self.cores)] + usage
+
+    def memory(self):
+        info = {}
+        if os.path.exists("/proc/meminfo"):
+            with open("/proc/meminfo", "r") as f:
+                for line in f:
+                    name, value = line.split(":", 1)
+                    info[name] = int(value.split()[0]) * 1024
+        total, swap = info.get("MemTotal", 0), info.get("SwapTotal", 0)
+        return [total, swap, total - info.get("MemAvailable", total), swap - info.get("SwapFree", swap)]
+
+
+class RaplSampler:
+    """Reads the RAPL energy counters of the Linux powercap interface directly.
+
+    The counters are unwrapped here, so the energy columns only ever increase, like those of EnergiBridge.
+    """
+
+    def __init__(self, powercap_dir=POWERCAP_DIR):
+        self.system = SystemStats()
+        self.domains = {}
+        for path in sorted(glob.glob(os.path.join(powercap_dir, "intel-rapl:*"))):
+            name = self._read(path, "name", str)
+            column = "PACKAGE_ENERGY (J)" if name.startswith("package") else f"{name.upper()}_ENERGY (J)"
+            if column in self.domains:
+                # Multi-socket hosts: the packages are summed into one column
+                self.domains[column].append(path)
+            else:
+                self.domains[column] = [path]
+        if "PACKAGE_ENERGY (J)" not in self.domains:
+            raise RuntimeError(f"No RAPL package domain found in {powercap_dir}. Is the intel_rapl driver loaded "
+                               f"and energy_uj readable?")
+        self._last = {path: self._read(path, "energy_uj") for paths in self.domains.values() for path in paths}
+        self._range = {path: self._read(path, "max_energy_range_uj") for path in self._last}
+        self._energy = {column: 0.0 for column in self.domains}
+
+    @staticmethod
+    def _read(path, name, cast=int):
+        with open(os.path.join(path, name), "r") as f:
+            return cast(f.read().strip())
+
+    def columns(self):
+        return ["Delta", "Time"] + self.system.columns() + sorted(self.domains) + MEMORY_COLUMNS
+
+    def read(self):
+        for column, paths in self.domains.items():
+            for path in paths:
+                value = self._read(path, "energy_uj")
+                step = value - self._last[path]
+                if step < 0:
+                    step += self._range[path]
+                self._last[path] = value
+                self._energy[column] += step / 1e6
+        return self.system.read() + [self._energy[column] for column in sorted(self.domains)] + self.system.memory()
+
+
+class SyntheticSampler:
+    """Replays a recorded measurement CSV as a deterministic sensor that needs no driver or privileges.
+
+    Sample i returns row i of the trace (cycling when the run outlasts it); the cumulative energy columns keep
+    increasing by the recorded steps.
+    """
+
+    def __init__(self, trace=None):
+        if trace is None:
+            traces = sorted(glob.glob(TRACE_GLOB, recursive=True))
+            if not traces:
+                raise RuntimeError("No recorded traces found in final_results; pass one with --trace.")
+            trace = traces[0]
+        data = pd.read_csv(trace)
+        self.header = [c for c in data.columns if c not in ("Delta", "Time")]
+        self.values = data[self.header].to_numpy(dtype=np.float64)
+        self.energy = np.array([c.endswith("(J)") for c in self.header])
+        self.steps = np.diff(self.values[:, self.energy], axis=0, prepend=self.values[:1, self.energy])
+        self.steps[self.steps < 0] = 0.0
+        self._index = 0
+        self._energy = self.values[0, self.energy].copy()
+
+    def columns(self):
+        return ["Delta", "Time"] + self.header
+
+    def read(self):
+        row = self.values[self._index % len(self.values)].copy()
+        if self._index > 0:
+            self._energy += self.steps[self._index % len(self.steps)]
+        row[self.energy] = self._energy
+        self._index += 1
+        return [int(v) if v.is_integer() else float(v) for v in row]
+
+
+def make_sampler(name, trace=None):
+    if name == "rapl":
+        return RaplSampler()
+    if name == "synthetic":
+        return SyntheticSampler(trace)
+    raise ValueError(f"Unknown sampler {name}. The energibridge sampler is the external binary.")
+
+
+def sample_process(sampler, process, interval=200, max_execution=0, emit=None):
+    """Calls emit(delta, time, values) with one sample of `sampler` every `interval` ms while process runs.
+
+    Delta and time are in ms, like the Delta and Time columns. With max_execution (seconds), the process is
+    killed after that time. Returns the exit code of the process.
+    """
+    start = previous = time.time()
+    samples = 0
+    while True:
+        now = time.time()
+        emit(int((now - previous) * 1000) if samples else 0, int(now * 1000), sampler.read())
+        previous, samples = now, samples + 1
+        if process.poll() is not None:
+            break
+        if max_execution and now - start > max_execution:
+            process.kill()
+            process.wait()
+            break
+        time.sleep(max(0.0, start + samples * interval / 1000 - time.time()))
+    return process.returncode
+
+
+def record(sampler, command, output, interval=200, max_execution=0, command_output=None):
+    """Runs command and writes one sample of `sampler` every `interval` ms to output, like EnergiBridge.
+
+    Returns the exit code of the command.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    log = open(command_output, "w") if command_output else subprocess.DEVNULL
+    try:
+        with open(output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(sampler.columns())
+
+            def emit(delta, now, values):
+                writer.writerow([delta, now] + values)
+                # Flushed per sample, so the live monitor can follow the run
+                f.flush()
+
+            process = subprocess.Popen(command, stdout=log, stderr=log, shell=len(command) == 1)
+            return sample_process(sampler, process, interval, max_execution, emit)
+    finally:
+        if command_output:
+            log.close()
+
+
+if __name__ == "__main__":
+    # The same arguments as the energibridge binary, so EnergiBridge can start either one
+    parser = argparse.ArgumentParser(description="Measure a command with a Python sampler backend.")
+    parser.add_argument("sampler", choices=[s for s in SAMPLERS if s != "energibridge"])
+    parser.add_argument("--trace", help="Recorded measurement CSV the synthetic sampler replays.", dest="trace",
+                        type=str, default=None)
+    parser.add_argument("-i", "--interval", dest="interval", type=int, default=200)
+    parser.add_argument("--max-execution", dest="max_execution", type=int, default=0)
+    parser.add_argument("-o", "--output", dest="output", type=str, required=True)
+    parser.add_argument("--command-output", dest="command_output", type=str, default=None)
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args, command = parser.parse_args(argv[:split]), argv[split + 1:]
+    sys.exit(record(make_sampler(args.sampler, args.trace), command, args.output, args.interval, args.max_execution,
+                    args.command_output))
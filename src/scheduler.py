@@ -0,0 +1,73 @@
+import os
+from time import sleep
+from concurrent.futures import ProcessPoolExecutor
+
+from src.energiBridge import Task
+
+
+class Slot:
+    """An isolated execution slot. Tasks of a slot run one after another, optionally pinned to `cores`."""
+
+    def __init__(self, index, cores=None):
+        self.index = index
+        self.cores = cores
+
+    def __repr__(self):
+        return f"Slot({self.index}, cores={self.cores})"
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def make_slots(count, pin=False):
+    """Creates `count` slots. With pin, the available cores are split into disjoint sets, one per slot."""
+    if not pin:
+        return [Slot(i) for i in range(count)]
+    cores = available_cores()
+    if count > len(cores):
+        raise ValueError(f"Cannot pin {count} slots to {len(cores)} cores")
+    size = len(cores) // count
+    return [Slot(i, cores[i * size:(i + 1) * size]) for i in range(count)]
+
+
+def assign(tasks, slots):
+    """Deals the (already shuffled) tasks round-robin over the slots, keeping their order within each slot."""
+    plan = {slot.index: [] for slot in slots}
+    for i, task in enumerate(tasks):
+        slot = slots[i % len(slots)]
+        task.slot = slot
+        plan[slot.index].append(task)
+    return plan
+
+
+def run_slot(tasks, settings, journal=None):
+    for index, task in enumerate(tasks):
+        if index > 0:
+            # Slept before the task instead of after it, so the sleep is part of the task's metrics
+            with task.timer.phase("sleep"):
+                sleep(settings.sleep)
+        task.run()
+        if journal is not None:
+            journal.record_done(journal.group(settings.output), task.id)
+    return len(tasks)
+
+
+def run_slots(tasks, slots, settings, journal=None):
+    """Runs every slot in its own worker process, so slots do not share environment or interpreter state.
+
+    A warmup task (id < 0) is run at the start of every slot instead of only in the first one.
+    """
+    warmups = [task for task in tasks if task.id < 0]
+    plan = assign([task for task in tasks if task.id >= 0], slots)
+    if warmups:
+        for slot in slots:
+            # Its own id, so the slots do not write the same warmup files
+            warmup = Task(-1 - slot.index, warmups[0].experiment, warmups[0].settings)
+            warmup.slot = slot
+            plan[slot.index].insert(0, warmup)
+    with ProcessPoolExecutor(max_workers=len(slots)) as pool:
+        futures = [pool.submit(run_slot, plan[slot.index], settings, journal) for slot in slots]
+        return sum(future.result() for future in futures)
@@ -0,0 +1,57 @@
+from itertools import combinations
+
+import numpy as np
+import scipy.stats as stats
+
+from src.analysis import compare
+
+# The choice between Welch and Mann-Whitney must not depend on the look, so normality is always tested at 0.05
+NORMALITY_ALPHA = 0.05
+
+
+def relative_precision(values, confidence=0.95):
+    """Half-width of the confidence interval of the mean, relative to the mean."""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return float("inf")
+    half_width = stats.t.ppf((1 + confidence) / 2, len(values) - 1) * np.std(values, ddof=1) / np.sqrt(len(values))
+    return float(half_width / abs(np.mean(values)))
+
+
+def spent_alpha(fraction, alpha=0.05):
+    """The O'Brien-Fleming-type spending function of Lan and DeMets: how much of alpha may be spent in total
+    once `fraction` of the maximum number of runs is measured."""
+    if fraction <= 0:
+        return 0.0
+    z = stats.norm.ppf(1 - alpha / 2) / np.sqrt(min(fraction, 1.0))
+    return float(min(alpha, 2 * (1 - stats.norm.cdf(z))))
+
+
+def check(energies, iterations, alpha=0.05, precision=0.01, max_runs=None, previous_runs=0):
+    """Decides whether an experiment group can stop after the runs measured so far.
+
+    energies maps every experiment name to its total energies. The group is settled once every experiment's
+    mean is known within `precision` and either every pair differs significantly or the default number of
+    `iterations` is reached. Returns (settled, statistics of the check).
+
+    Testing again after every batch inflates the false positives, so with max_runs only the share of alpha
+    spent since the previous look (after previous_runs runs) is used as the significance level of this look.
+    """
+    runs = min(len(values) for values in energies.values())
+    if max_runs:
+        alpha = spent_alpha(runs / max_runs, alpha) - spent_alpha(previous_runs / max_runs, alpha)
+    precisions = {name: relative_precision(values) for name, values in energies.items()}
+    precise = all(p <= precision for p in precisions.values())
+    p_values = {}
+    for (name1, values1), (name2, values2) in combinations(energies.items(), 2):
+        result = compare(np.asarray([values1], dtype=float), np.asarray([values2], dtype=float), alpha,
+                         NORMALITY_ALPHA)
+        p_values[f"{name1} vs {name2}"] = float(result["p_value"][0])
+    significant = all(p < alpha for p in p_values.values())
+    return precise and (significant or runs >= iterations), {
+        "runs": runs,
+        "alpha": alpha,
+        "precision": precisions,
+        "p_values": p_values,
+        "significant": significant,
+    }
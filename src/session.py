@@ -0,0 +1,115 @@
+import os, sys, json, time, argparse, subprocess
+
+import numpy as np
+import pandas as pd
+
+SESSION_DIR = "sessions"
+# The placeholder workload that keeps the sampler of a session running until the stop file appears
+HOLD = "import os, sys, time\nwhile not os.path.exists(sys.argv[1]):\n    time.sleep(0.05)"
+START_TIMEOUT = 30
+
+
+class Session:
+    """One long-lived sampler that measures a sequence of tasks.
+
+    The sampler is started once with a placeholder workload and writes a single trace while the tasks run one
+    after the other. Every task appends a marker with its start and end time (epoch ms, like the Time column)
+    to <name>.markers.jsonl; split() cuts the trace into the per-task measurement and info files afterwards.
+    """
+
+    def __init__(self, bridge, directory, name):
+        self.trace_path = os.path.join(directory, name + ".csv")
+        self.markers_path = os.path.join(directory, name + ".markers.jsonl")
+        self.log_path = os.path.join(directory, name + ".log")
+        self.stop_path = os.path.join(directory, name + ".stop")
+        self.argv = bridge.session_argv(self.trace_path, self.log_path, [sys.executable, "-c", HOLD, self.stop_path])
+        self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _samples(self):
+        try:
+            with open(self.trace_path, "r") as f:
+                return max(0, f.read().count("\n") - 1)
+        except OSError:
+            return 0
+
+    def start(self):
+        """Starts the sampler and waits for its first sample, so every run starts inside the trace."""
+        os.makedirs(os.path.dirname(self.trace_path), exist_ok=True)
+        for path in [self.stop_path, self.markers_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        self.process = subprocess.Popen(self.argv)
+        deadline = time.time() + START_TIMEOUT
+        while self._samples() < 1:
+            if self.process.poll() is not None or time.time() > deadline:
+                self.stop()
+                raise RuntimeError(f"The sampler of session {self.trace_path} did not start.")
+            time.sleep(0.05)
+        return self
+
+    def mark(self, task, start, end, info):
+        """Records the run of a task between start and end (seconds since the epoch) with its info file."""
+        record = {"id": task.id, "experiment": task.experiment.name, "start": int(start * 1000),
+                  "end": int(end * 1000), "measurements": task.measurements_output_path,
+                  "info": task.info_output_path, "data": info}
+        with open(self.markers_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+
+    def stop(self):
+        """Ends the placeholder workload; the sampler takes its last sample and exits."""
+        if self.process is None:
+            return
+        open(self.stop_path, "w").close()
+        self.process.wait()
+        self.process = None
+        os.remove(self.stop_path)
+
+    def split(self):
+        return split_session(self.trace_path, self.markers_path)
+
+
+def split_session(trace, markers):
+    """Writes the measurements and info file of every marked run of a session trace.
+
+    A run gets the samples from the last one at or before its start to the first one at or after its end, so
+    its energy covers the whole run like a sampler of its own would. Returns the ids of the runs written.
+    """
+    data = pd.read_csv(trace)
+    times = data["Time"].to_numpy()
+    delta = data.columns.get_loc("Delta")
+    written = []
+    with open(markers, "r") as f:
+        for line in f:
+            try:
+                marker = json.loads(line)
+            except ValueError:
+                continue
+            first = max(int(np.searchsorted(times, marker["start"], "right")) - 1, 0)
+            last = min(int(np.searchsorted(times, marker["end"], "left")), len(times) - 1)
+            rows = data.iloc[first:last + 1].copy()
+            rows.iloc[0, delta] = 0
+            os.makedirs(os.path.dirname(marker["measurements"]), exist_ok=True)
+            rows.to_csv(marker["measurements"], index=False)
+            info = dict(marker["data"], session={"trace": trace, "rows": [first, last]})
+            os.makedirs(os.path.dirname(marker["info"]), exist_ok=True)
+            with open(marker["info"], "w") as out:
+                json.dump(info, out, indent=4)
+            written.append(marker["id"])
+    return written
+
+
+if __name__ == "__main__":
+    # Splits a session again, e.g. after a crash before the campaign could do it
+    parser = argparse.ArgumentParser(description="Split a session trace into the measurements of its runs.")
+    parser.add_argument("traces", nargs="+")
+    args = parser.parse_args()
+    for trace in args.traces:
+        runs = split_session(trace, os.path.splitext(trace)[0] + ".markers.jsonl")
+        print(f"Split {len(runs)} runs from {trace}")
@@ -0,0 +1,190 @@
+import os, json, glob, re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.measurements import correct_deltas, energy_column
+
+# Columns that are counters or timestamps are kept as int64, everything else as float32.
+# Cumulative energy counters ("... (J)") stay float64: at ~20 kJ a float32 only resolves
+# to ~2 mJ, which is too coarse for the deltas we compute from them.
+INT_COLUMNS = ["Delta", "Time", "TOTAL_MEMORY", "TOTAL_SWAP", "USED_MEMORY", "USED_SWAP"]
+
+
+def column_dtype(column):
+    if column in INT_COLUMNS:
+        return np.int64
+    if column.endswith("(J)"):
+        return np.float64
+    return np.float32
+
+
+def column_file(column):
+    return re.sub(r"[^A-Za-z0-9]+", "_", column).strip("_") + ".npy"
+
+
+def find_measurement_dirs(base_dir):
+    """Yields (person, resolution, experiment, measurements_dir) for every run directory in base_dir."""
+    base_dir = Path(base_dir)
+    for path in sorted(glob.glob(str(base_dir / "*" / "*" / "**" / "measurements"), recursive=True)):
+        parts = Path(path).relative_to(base_dir).parts
+        yield parts[0], parts[1], parts[-2], path
+
+
+def run_id(file):
+    name = Path(file).stem
+    return int(name) if name.lstrip("-").isdigit() else name
+
+
+def _sources(files):
+    return {os.path.basename(f): [os.path.getsize(f), os.path.getmtime(f)] for f in files}
+
+
+def _run_files(measurements_dir):
+    return sorted(glob.glob(os.path.join(measurements_dir, "*.csv")), key=lambda f: str(run_id(f)).zfill(10))
+
+
+def ingest_experiment(measurements_dir, partition_dir):
+    """Converts all run CSVs of one experiment into a single columnar partition.
+
+    Runs with fewer than two samples have no energy and are left out. Returns False if the partition was
+    already up to date with the CSV files.
+    """
+    files = _run_files(measurements_dir)
+    sources = _sources(files)
+    meta_path = os.path.join(partition_dir, "columns.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            if json.load(f).get("sources") == sources:
+                return False
+
+    frames = [pd.read_csv(file) for file in files]
+    skipped = [os.path.basename(file) for file, data in zip(files, frames) if len(data) < 2]
+    if skipped:
+        print(f"Skipping runs with fewer than two samples in {measurements_dir}: {', '.join(skipped)}")
+        kept = [index for index, data in enumerate(frames) if len(data) >= 2]
+        files, frames = [files[i] for i in kept], [frames[i] for i in kept]
+    columns = []
+    for data in frames:
+        columns += [c for c in data.columns if c not in columns]
+
+    os.makedirs(partition_dir, exist_ok=True)
+    lengths = [len(data) for data in frames]
+    offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    np.save(os.path.join(partition_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(partition_dir, "runs.npy"), np.array([str(run_id(f)) for f in files]))
+
+    for column in columns:
+        dtype = column_dtype(column)
+        values = np.zeros(offsets[-1], dtype=dtype) if dtype == np.int64 else np.full(offsets[-1], np.nan, dtype=dtype)
+        for data, start, end in zip(frames, offsets[:-1], offsets[1:]):
+            if column in data.columns:
+                values[start:end] = data[column].to_numpy(dtype=dtype)
+        np.save(os.path.join(partition_dir, column_file(column)), values)
+
+    with open(meta_path, "w") as f:
+        json.dump({
+            "columns": {c: np.dtype(column_dtype(c)).name for c in columns},
+            "source": os.path.abspath(measurements_dir),
+            "sources": sources,
+            "skipped": skipped,
+        }, f, indent=4)
+    return True
+
+
+def ingest(base_dir, store_dir):
+    """Ingests every <person>/<resolution>/<experiment>/measurements directory of base_dir into store_dir."""
+    for person, resolution, experiment, measurements_dir in find_measurement_dirs(base_dir):
+        partition_dir = os.path.join(store_dir, person, resolution, experiment)
+        if ingest_experiment(measurements_dir, partition_dir):
+            print(f"Ingested {person}/{resolution}/{experiment}")
+
+
+class Partition:
+    """Read-only, memory-mapped view of all runs of one experiment.
+
+    A partition whose measurements directory gained or changed CSV files since it was ingested is ingested
+    again when it is opened, so readers never see an outdated store.
+    """
+
+    def __init__(self, store_dir, person, resolution, experiment):
+        self.path = os.path.join(store_dir, person, resolution, experiment)
+        meta_path = os.path.join(self.path, "columns.json")
+        with open(meta_path, "r") as f:
+            source = json.load(f).get("source")
+        if source is not None and os.path.isdir(source) and ingest_experiment(source, self.path):
+            print(f"Ingested {person}/{resolution}/{experiment} again, its measurements changed.")
+        with open(meta_path, "r") as f:
+            self.columns = json.load(f)["columns"]
+        self.offsets = np.load(os.path.join(self.path, "offsets.npy"))
+        self.runs = [str(r) for r in np.load(os.path.join(self.path, "runs.npy"))]
+
+    def __len__(self):
+        return len(self.runs)
+
+    def column(self, column):
+        if column not in self.columns:
+            raise KeyError(f"Column {column} not found in {self.path}")
+        return np.load(os.path.join(self.path, column_file(column)), mmap_mode="r")
+
+    def run(self, column, run):
+        index = self.runs.index(str(run))
+        return self.column(column)[self.offsets[index]:self.offsets[index + 1]]
+
+    def first_last(self, column, runs=None):
+        """Returns the first and last value of column for every run (or only the given runs)."""
+        values = self.column(column)
+        index = np.arange(len(self.runs)) if runs is None else np.array([self.runs.index(str(r)) for r in runs])
+        return values[self.offsets[index]], values[self.offsets[index + 1] - 1]
+
+    def energy_column(self):
+        column = energy_column(self.columns)
+        if column is None:
+            raise KeyError(f"Energy column not found in {self.path}")
+        return column
+
+    def energy_steps(self, wrap=None):
+        """Counter steps of all runs in one array, corrected for counter wraps and resets.
+
+        Step i is the energy between sample i and i + 1; the last step of every run is zero. The steps of all
+        runs are computed in one pass; only the runs with a negative step are corrected one by one.
+        """
+        values = np.asarray(self.column(self.energy_column()), dtype=np.float64)
+        # One trailing zero step so every run, including a last single-sample run, has a step to sum
+        steps = np.append(np.diff(values), 0.0)
+        steps[self.offsets[1:] - 1] = 0.0
+        broken = np.flatnonzero(steps < 0)
+        if len(broken):
+            delta = self.column("Delta") if "Delta" in self.columns else None
+            for index in np.unique(np.searchsorted(self.offsets, broken, side="right") - 1):
+                start, end = self.offsets[index], self.offsets[index + 1] - 1
+                intervals = delta[start + 1:end + 1] if delta is not None else None
+                steps[start:end] = correct_deltas(steps[start:end], intervals, wrap)
+        return steps
+
+    def total_energy(self, runs=None, wrap=None):
+        """Energy of every run (or only the given runs), corrected for counter wraps and resets."""
+        if not self.runs:
+            return np.zeros(0)
+        totals = np.add.reduceat(self.energy_steps(wrap), self.offsets[:-1])
+        if runs is None:
+            return totals
+        return totals[[self.runs.index(str(r)) for r in runs]]
+
+
+def partitions(store_dir):
+    """Yields (person, resolution, experiment) for every partition in store_dir."""
+    store_dir = Path(store_dir)
+    for path in sorted(glob.glob(str(store_dir / "*" / "*" / "*" / "columns.json"))):
+        yield Path(path).relative_to(store_dir).parts[:3]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest EnergiBridge measurements into a columnar store.")
+    parser.add_argument("base_dir", nargs="?", default="final_results")
+    parser.add_argument("store_dir", nargs="?", default="measurement_store")
+    args = parser.parse_args()
+    ingest(args.base_dir, args.store_dir)
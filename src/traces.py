@@ -0,0 +1,124 @@
+import os, argparse, warnings
+
+import numpy as np
+import pandas as pd
+
+from src.store import Partition, partitions
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+class Traces:
+    """The energy traces of all runs of one experiment, on their own time axis starting at zero.
+
+    All runs are held in single concatenated arrays with the offsets of the store, so every operation works
+    on all runs at once instead of looping over them.
+    """
+
+    def __init__(self, partition, wrap=None):
+        self.runs = partition.runs
+        self.offsets = partition.offsets
+        lengths = np.diff(self.offsets)
+        time = np.asarray(partition.column("Time"), dtype=np.float64)
+        self.time = (time - np.repeat(time[self.offsets[:-1]], lengths)) / 1e3
+        # Cumulative energy since the first sample of the run
+        steps = partition.energy_steps(wrap)
+        cumulative = np.concatenate([[0.0], np.cumsum(steps)[:-1]])
+        self.energy = cumulative - np.repeat(cumulative[self.offsets[:-1]], lengths)
+        self.duration = self.time[self.offsets[1:] - 1]
+
+    def __len__(self):
+        return len(self.runs)
+
+    def energy_at(self, times):
+        """Interpolates the cumulative energy of every run at `times`, a (runs, n) matrix of seconds.
+
+        The runs are laid out one after another on a single axis, so one np.interp call covers all of them.
+        Times after the end of a run are NaN.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        span = np.max(self.duration) + 1.0
+        shift = np.arange(len(self))[:, None] * span
+        run = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        values = np.interp(times + shift, self.time + run * span, self.energy).reshape(times.shape)
+        return np.where(times <= self.duration[:, None], values, np.nan)
+
+    def resample(self, step=0.1):
+        """Aligns every run on a common grid of `step` seconds.
+
+        Returns the grid and a (runs, grid) matrix of the mean power (W) in each step, NaN after a run ended.
+        """
+        grid = np.round(np.arange(0.0, np.max(self.duration) + 1e-9, step), 6)
+        energy = self.energy_at(np.broadcast_to(grid, (len(self), len(grid))))
+        return grid[:-1], np.diff(energy, axis=1) / step
+
+    def phase_energy(self, startup=1.0):
+        """Splits the energy of every run into the startup phase (the first `startup` seconds) and the rest."""
+        boundary = np.minimum(startup, self.duration)[:, None]
+        startup_energy = self.energy_at(boundary)[:, 0]
+        total = self.energy[self.offsets[1:] - 1]
+        steady = self.duration - boundary[:, 0]
+        return pd.DataFrame({
+            "run": self.runs,
+            "duration": self.duration,
+            "startup_energy": startup_energy,
+            "steady_energy": total - startup_energy,
+            "steady_power": np.divide(total - startup_energy, steady, out=np.full(len(self), np.nan),
+                                      where=steady > 0),
+        })
+
+
+def power_curves(grid, power, percentiles=PERCENTILES):
+    """Mean and percentile power over all runs at every grid point, with the number of runs still running."""
+    curves = pd.DataFrame({"time": grid, "runs": np.sum(~np.isnan(power), axis=0)})
+    with warnings.catch_warnings():
+        # Grid points after the end of every run but the longest have only NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        curves["mean"] = np.nanmean(power, axis=0)
+        for q, values in zip(percentiles, np.nanpercentile(power, percentiles, axis=0)):
+            curves[f"p{q}"] = values
+    return curves
+
+
+def completion_times(traces, percentiles=PERCENTILES):
+    """The distribution of the run durations (s)."""
+    summary = {"runs": len(traces), "mean": float(np.mean(traces.duration)), "std": float(np.std(traces.duration))}
+    for q, value in zip(percentiles, np.percentile(traces.duration, percentiles)):
+        summary[f"p{q}"] = float(value)
+    return summary
+
+
+def analyze_traces(store_dir, output_dir, step=0.1, startup=1.0):
+    """Writes the power curves of every experiment in the store, and the phase energies and completion times
+    of all runs, into output_dir."""
+    phases, completions = [], []
+    for person, resolution, experiment in partitions(store_dir):
+        traces = Traces(Partition(store_dir, person, resolution, experiment))
+        grid, power = traces.resample(step)
+        curve_dir = os.path.join(output_dir, person, resolution)
+        os.makedirs(curve_dir, exist_ok=True)
+        power_curves(grid, power).to_csv(os.path.join(curve_dir, f"{experiment}_power.csv"), index=False)
+
+        phase = traces.phase_energy(startup)
+        phase.insert(0, "experiment", experiment)
+        phase.insert(0, "resolution", resolution)
+        phase.insert(0, "person", person)
+        phases.append(phase)
+        completions.append({"person": person, "resolution": resolution, "experiment": experiment,
+                            **completion_times(traces)})
+        print(f"Analysed the traces of {person}/{resolution}/{experiment}")
+
+    pd.concat(phases, ignore_index=True).to_csv(os.path.join(output_dir, "phases.csv"), index=False)
+    pd.DataFrame(completions).to_csv(os.path.join(output_dir, "completion_times.csv"), index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Align the energy traces of the runs and analyse them over time.")
+    parser.add_argument("store_dir", nargs="?", default="measurement_store")
+    parser.add_argument("output_dir", nargs="?", default="traces")
+    parser.add_argument("--step", help="Step of the common time grid in seconds.", dest="step", type=float,
+                        default=0.1)
+    parser.add_argument("--startup", help="Length of the startup phase in seconds.", dest="startup", type=float,
+                        default=1.0)
+    args = parser.parse_args()
+    analyze_traces(args.store_dir, args.output_dir, args.step, args.startup)
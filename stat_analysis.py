@@ -1,7 +1,5 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import glob
 import numpy as np
@@ -9,6 +7,16 @@ import scipy.stats as stats
 from scipy.stats import ttest_ind, mannwhitneyu
 import argparse
 
+from src.store import Partition
+from src.cache import SummaryCache
+from src.ingest import ingest_files
+from src.measurements import summarize_energy
+from src.analysis import load_runs, analyze_all
+from src.plots import (render_all, report_jobs, violin_box_figure, combined_violin_box_figure, histogram_figure,
+                       qq_figure)
+from src.calibration import load_models, subtract_overhead
+from src.resampling import bootstrap, permutation_test
+from src.federation import load_federated, analyze_federated, host_summary
 
 
 
@@ -20,80 +28,51 @@ def get_csv_files(base_dir, person, resolution, decoding):
 
     return file_list
 
-def calculate_total_energy(file_list):
+def calculate_total_energy(file_list, cache=None, workers=None):
     # Store total energy values for each test
     total_energy_per_test = []
 
-    # print(f"printing experiment results of {filename}")
-
-    # Process each file separately
-    for file in file_list:
-        data = pd.read_csv(file)
-
-        filename = os.path.basename(file)
-
-
-        # Convert time to seconds (assuming nanoseconds in original format)
-        data["Time"] = (data["Time"] - data["Time"].min()) / 1e9
-
-        if "PACKAGE_ENERGY (J)" in data.columns:
-            total_energy = data["PACKAGE_ENERGY (J)"].iloc[-1] - data["PACKAGE_ENERGY (J)"].iloc[0]
-        elif "CPU_ENERGY (J)" in data.columns:
-            total_energy = data["CPU_ENERGY (J)"].iloc[-1] - data["CPU_ENERGY (J)"].iloc[0]
-        else:
-            print(f"Energy column not found in {file}. Please check the column names.")
-            exit()
-
-        print(f"{total_energy} - Total energy consumption in file {filename}.")
-
-        
-        # if total_energy < 50 and :
+    # Files are parsed on a process pool; summaries come back in the order of file_list.
+    # Only the first and last row of each file are needed for the total energy.
+    summaries, errors = ingest_files(file_list, workers=workers, cache=cache,
+                                     summarize=cache.summarize if cache is not None else summarize_energy)
+    for error in errors:
+        print(f"Skipping {error}")
+
+    for file, summary in zip(file_list, summaries):
+        if summary is None:
+            continue
+        total_energy = summary["total_energy"]
+        print(f"{total_energy} - Total energy consumption in file {os.path.basename(file)}.")
         total_energy_per_test.append(total_energy)
 
     return total_energy_per_test
 
-def save_plot(plt, filename, output_dir):
+def calculate_total_energy_from_store(store_dir, person, resolution, decoding):
+    """Reads the per-run energy totals from the columnar store written by src/store.py."""
+    partition = Partition(store_dir, person, resolution, decoding)
+    total_energy_per_test = partition.total_energy()
+    for run, total_energy in zip(partition.runs, total_energy_per_test):
+        print(f"{total_energy} - Total energy consumption in file {run}.csv.")
+    return list(total_energy_per_test)
+
+def save_plot(figure, filename, output_dir):
+    # The figures of src/plots.py are drawn without pyplot, so no window is opened
     os.makedirs(output_dir, exist_ok=True)  # Ensure the directory exists
     plot_path = os.path.join(output_dir, filename)
-    plt.savefig(plot_path)
-    plt.show()
+    figure.savefig(plot_path)
 
 
 
 def violin_box_plot(df_results, experiment, person, output_dir):
     ### **Plot All Data (Before Outlier Removal)**
-    plt.figure(figsize=(10, 6))
-    sns.violinplot(y=df_results["Total Energy"], inner=None, color="lightblue", linewidth=1)
-    sns.boxplot(y=df_results["Total Energy"], width=0.3, boxprops={'zorder': 2, 'facecolor': 'none'}, showcaps=True, whiskerprops={'linewidth': 2}, medianprops={'color': 'red'}, flierprops={'marker': 'o', 'color': 'black', 'alpha': 0.5})
-    sns.stripplot(y=df_results["Total Energy"], color="black", alpha=0.3, size=4)
-
-    plt.ylabel("Total Energy (J)")
-    plt.title(f"Violin + Box Plot of Total Energy per Test ({experiment})")
-    plt.title(f"Violin + Box Plot of Total Energy per Test ({experiment})")
-    plt.grid(True)
-  
-    save_plot(plt, f"{person}_violin_box_{experiment}.png", output_dir)
+    figure = violin_box_figure(df_results["Total Energy"], experiment)
+    save_plot(figure, f"{person}_violin_box_{experiment}.png", output_dir)
 
 
 def combined_violin_box_plot(df_list, labels, experiment, person, output_dir):
-    # Add a column to each DataFrame to indicate the label
-    for df, label in zip(df_list, labels):
-        df["Label"] = label
-
-    # Combine the DataFrames
-    combined_df = pd.concat(df_list)
-
-    plt.figure(figsize=(10, 10))
-    sns.violinplot(x="Label", y="Total Energy", data=combined_df, inner=None, linewidth=1)
-    sns.boxplot(x="Label", y="Total Energy", data=combined_df, width=0.3, boxprops={'zorder': 2, 'facecolor': 'none'}, showcaps=True, whiskerprops={'linewidth': 2}, medianprops={'color': 'red'}, flierprops={'marker': 'o', 'color': 'black', 'alpha': 0.5})
-    sns.stripplot(x="Label", y="Total Energy", data=combined_df, color="black", alpha=0.3, size=4)
-
-    plt.ylabel("Total Energy (J)")
-    plt.title(f"Combined Violin + Box Plot of Total Energy per Test {experiment}")
-    plt.grid(True)
-    plt.legend()
-
-    save_plot(plt, f"{person}_combined_violin_box_{experiment}.png", output_dir)
+    figure = combined_violin_box_figure({label: df["Total Energy"] for df, label in zip(df_list, labels)}, experiment)
+    save_plot(figure, f"{person}_combined_violin_box_{experiment}.png", output_dir)
 
 
 def outlier_removal(df_results):
@@ -158,6 +137,8 @@ def calculate_effect_size_non_normal(df1, df2):
     median_diff = median_exp1 - median_exp2
 
     median_percentage = 100 - median_exp1 * 100 / median_exp2
+    intervals = bootstrap(df1["Total Energy"], df2["Total Energy"])
+    p_value, exact = permutation_test(df1["Total Energy"], df2["Total Energy"])
     
     # N1 = len(df1)
     # N2 = len(df2)
@@ -171,7 +152,13 @@ def calculate_effect_size_non_normal(df1, df2):
     print("\n--- Effect Size Metrics (Non-Normal Data) ---")
     print(f"Median Difference: {median_diff:.4f} J")
     print(f"Median Difference Percentage: {median_percentage}%")
-    # print(f"Percentage of pairs where {df1} > {df2}: {percentage_pairs:.4f}")
+    _, low, high = intervals["median_diff"]
+    print(f"Median Difference 95% CI (bootstrap): [{low:.4f}, {high:.4f}] J")
+    _, low, high = intervals["median_percent_change"]
+    print(f"Median Difference Percentage 95% CI (bootstrap): [{low:.2f}, {high:.2f}]%")
+    print(f"Permutation test ({'exact' if exact else 'approximate'}): p-value={p_value:.4f}")
+
+    return median_diff, median_percentage
     
 
 
@@ -193,159 +180,253 @@ def analyze_statistical_differences(df1, df2, exp1, exp2):
     else:
         print("At least one dataset is not normally distributed. Using Mann-Whitney U test and CL effect size.")
         u_stat, p_value = perform_mann_whitney_u_test(df1, df2)
-        return calculate_effect_size_non_normal(df1, df2, u_stat)
+        return calculate_effect_size_non_normal(df1, df2)
 
 
 def histogram_plot(df_results, experiment_name, output_dir):
     ### **Histogram of Total Energy (Before Outlier Removal)**
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df_results["Total Energy"], color="blue", kde=True, bins=20, alpha=0.5)
-    plt.xlabel("Total Energy (J)")
-    plt.ylabel("Time")
-    plt.title(f"Histogram of Total Energy ({experiment_name})")
-    plt.grid(True)
-    
-    save_plot(plt, f"histogram_total_energy_{experiment_name}.png", output_dir)
+    figure = histogram_figure(df_results["Total Energy"], experiment_name)
+    save_plot(figure, f"histogram_total_energy_{experiment_name}.png", output_dir)
 
 
 def qq_plot(df_results, message, output_dir):
     ### **QQ Plot to Check Normality (Before Outlier Removal)**
-    plt.figure(figsize=(6, 6))
-    stats.probplot(df_results["Total Energy"], dist="norm", plot=plt)
-    plt.title(f"QQ Plot of Total Energy ({message})")
-    plt.grid(True)
-
-    save_plot(plt, f"qqplot_{message}.png", output_dir)
-
-
-# Define base directory and subdirectories
-base_dir = Path("final_results")  # This can be changed easily
-person = "Gijs"
-resolution = "1080p"
-exp1 = f"decode_{resolution}_h264"
-exp2 = f"decode_{resolution}_h265"
-experiment = f"decode_{resolution}"
-
-output_dir = os.path.join(f"{person}_graphs", resolution)
-
-print(f"Analyzing results for {person} at {resolution} resolution")
-
+    figure = qq_figure(df_results["Total Energy"], message)
+    save_plot(figure, f"qqplot_{message}.png", output_dir)
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Analyse the EnergiBridge experiment results.")
+    parser.add_argument("--person", help="Results of which person to analyse.", dest="person", type=str,
+                        default="Gijs")
+    parser.add_argument("--resolution", help="Resolution to analyse.", dest="resolution", type=str,
+                        default="1080p")
+    parser.add_argument("--all", help="Analyse every person, resolution and codec pair at once and write the "
+                                      "results to this CSV file. No plots are made.",
+                        dest="all", type=str, default=None)
+    parser.add_argument("--calibration", help="Overhead models of `python -m src.calibration`: files, folders of "
+                                              "models, or NAME=model.json to use a model for the runs of a host "
+                                              "or contributor. With --all, the net energy with the measurement "
+                                              "overhead of each run's host subtracted is analysed.",
+                        dest="calibration", type=str, nargs="+", default=None)
+    parser.add_argument("-i", "--interval", help="Sampling interval (ms) of the runs whose info file does not "
+                                                 "record one.",
+                        dest="interval", type=int, default=200)
+    parser.add_argument("--report", help="Render the plots of every person and resolution without opening any "
+                                         "windows into <person>_graphs folders in this directory.",
+                        dest="report", type=str, default=None)
+    parser.add_argument("--workers", help="Number of processes to use for --report and --resamples.",
+                        dest="workers", type=int, default=None)
+    parser.add_argument("--resamples", help="With --all, also compute bootstrap confidence intervals and "
+                                            "permutation p-values from this many resamples.",
+                        dest="resamples", type=int, default=0)
+    parser.add_argument("--federated", help="Analyse the codec pairs of every host separately and pooled over all "
+                                           "contributors, and write the results to this CSV file.",
+                        dest="federated", type=str, default=None)
+    parser.add_argument("--reference", help="With --federated, normalize every host to the median of this codec "
+                                            "instead of the median of all its runs.",
+                        dest="reference", type=str, default=None)
+    parser.add_argument("--seed", help="Seed of the resampling.", dest="seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def analyze_matrix(base_dir, output, models=None, interval=200, resamples=0, seed=0, workers=None):
+    """Runs the statistics for every experiment pair in base_dir and writes them to one CSV file.
+
+    With overhead models (by host), the net energy of the workloads is analysed instead of the measured total.
+    """
+    with SummaryCache(summarize=summarize_energy) as cache:
+        # The host, interval and launch of every run select its overhead
+        runs = load_federated(base_dir, cache) if models is not None else load_runs(base_dir, cache)
+    if models is not None:
+        runs = subtract_overhead(runs, models, interval).dropna(subset=["net_energy"])
+        if len(runs):
+            print(f"Mean measurement overhead: {(runs['total_energy'] - runs['net_energy']).mean():.4f} J per run")
+    results = analyze_all(runs, value="net_energy" if models is not None else "total_energy",
+                          resamples=resamples, seed=seed, workers=workers)
+    if results.empty:
+        print("No experiment pairs to analyse.")
+        return results
+    results.to_csv(output, index=False)
+    print(results[["person", "resolution", "exp1", "exp2", "filtered", "test", "p_value", "cohens_d",
+                   "median_diff"]].to_string(index=False))
+    print(f"Results written to {output}")
+    return results
+
+
+def analyze_federation(base_dir, output, reference=None, resamples=0, seed=0, workers=None):
+    """Runs the statistics per host and pooled over all contributor trees in base_dir."""
+    with SummaryCache(summarize=summarize_energy) as cache:
+        runs = load_federated(base_dir, cache)
+    print(host_summary(runs).to_string(index=False))
+    results = analyze_federated(runs, reference=reference, resamples=resamples, seed=seed, workers=workers)
+    results.to_csv(output, index=False)
+    print(results[["scope", "person", "resolution", "exp1", "exp2", "filtered", "test", "p_value",
+                   "cohens_d"]].to_string(index=False))
+    print(f"Results written to {output}")
+    return results
+
+
+def render_report(base_dir, output_root, workers=None):
+    """Renders all plots headless and in parallel. Plots whose data did not change are not rendered again."""
+    with SummaryCache(summarize=summarize_energy) as cache:
+        runs = load_runs(base_dir, cache)
+    rendered = render_all(report_jobs(runs, output_root), output_root, workers)
+    print(f"Rendered {len(rendered)} plots into {output_root}")
+
+
+def main():
+    args = cli()
+
+    # Define base directory and subdirectories
+    base_dir = Path("final_results")  # This can be changed easily
+    store_dir = Path("measurement_store")  # Created by `python -m src.store final_results measurement_store`
+    if args.all is not None or args.report is not None or args.federated is not None:
+        if args.federated is not None:
+            analyze_federation(base_dir, args.federated, args.reference, args.resamples, args.seed, args.workers)
+        if args.all is not None:
+            models = load_models(args.calibration) if args.calibration is not None else None
+            analyze_matrix(base_dir, args.all, models, args.interval, args.resamples, args.seed, args.workers)
+        if args.report is not None:
+            render_report(base_dir, args.report, args.workers)
+        return
+
+    person = args.person
+    resolution = args.resolution
+    exp1 = f"decode_{resolution}_h264"
+    exp2 = f"decode_{resolution}_h265"
+    experiment = f"decode_{resolution}"
+
+    output_dir = os.path.join(f"{person}_graphs", resolution)
+
+    print(f"Analyzing results for {person} at {resolution} resolution")
+
+
+
+    if (store_dir / person / resolution / exp1).exists() and (store_dir / person / resolution / exp2).exists():
+        # Read the totals straight from the memory-mapped store instead of parsing every CSV again
+        total_energy_per_test_exp1 = calculate_total_energy_from_store(store_dir, person, resolution, exp1)
+        total_energy_per_test_exp2 = calculate_total_energy_from_store(store_dir, person, resolution, exp2)
+    else:
+        # Convert Path object to string for glob
+        file_list_exp1 =  get_csv_files(base_dir, person, resolution, exp1)
+        file_list_exp2 =  get_csv_files(base_dir, person, resolution, exp2)
 
+        if not file_list_exp1 or not file_list_exp2:
+            print(f"No CSV files found in the directory. Please check the path.")
+            exit()
 
-# Convert Path object to string for glob
-file_list_exp1 =  get_csv_files(base_dir, person, resolution, exp1)
-file_list_exp2 =  get_csv_files(base_dir, person, resolution, exp2)
+        #process csv files, reusing the per-run totals of earlier analyses
+        with SummaryCache(summarize=summarize_energy) as cache:
+            total_energy_per_test_exp1 = calculate_total_energy(file_list_exp1, cache)
+            total_energy_per_test_exp2 = calculate_total_energy(file_list_exp2, cache)
 
-if not file_list_exp1 or not file_list_exp2:
-    print(f"No CSV files found in the directory. Please check the path.")
-    exit()
+    # Convert to DataFrame for visualization
+    df_results_1 = pd.DataFrame({"Total Energy": total_energy_per_test_exp1})
+    df_results_2 = pd.DataFrame({"Total Energy": total_energy_per_test_exp2})
 
-#process csv files
-total_energy_per_test_exp1 = calculate_total_energy(file_list_exp1)
-total_energy_per_test_exp2 = calculate_total_energy(file_list_exp2)
+    ### **Shapiro-Wilk Normality Test (Before Outlier Removal)**
+    shapiro_test_exp1 = stats.shapiro(df_results_1["Total Energy"])
+    shapiro_test_exp2 = stats.shapiro(df_results_2["Total Energy"])
 
-# Convert to DataFrame for visualization
-df_results_1 = pd.DataFrame({"Total Energy": total_energy_per_test_exp1})
-df_results_2 = pd.DataFrame({"Total Energy": total_energy_per_test_exp2})
+    print(f"Shapiro-Wilk Test {exp1}: W={shapiro_test_exp1.statistic:.4f}, p-value={shapiro_test_exp1.pvalue:.4f}")
+    print(f"Shapiro-Wilk Test {exp2}: W={shapiro_test_exp2.statistic:.4f}, p-value={shapiro_test_exp2.pvalue:.4f}")
 
-### **Shapiro-Wilk Normality Test (Before Outlier Removal)**
-shapiro_test_exp1 = stats.shapiro(df_results_1["Total Energy"])
-shapiro_test_exp2 = stats.shapiro(df_results_2["Total Energy"])
+    # Visualize violin + box plots
+    violin_box_plot(df_results_1, exp1, person, output_dir)
+    violin_box_plot(df_results_2, exp2, person, output_dir)
 
-print(f"Shapiro-Wilk Test {exp1}: W={shapiro_test_exp1.statistic:.4f}, p-value={shapiro_test_exp1.pvalue:.4f}")
-print(f"Shapiro-Wilk Test {exp2}: W={shapiro_test_exp2.statistic:.4f}, p-value={shapiro_test_exp2.pvalue:.4f}")
 
-# Visualize violin + box plots
-violin_box_plot(df_results_1, exp1, person, output_dir)
-violin_box_plot(df_results_2, exp2, person, output_dir)
+    #Outlier Removal
+    df_results_1_filtered = outlier_removal(df_results_1)
+    df_results_2_filtered = outlier_removal(df_results_2)
 
+    combined_violin_box_plot([df_results_1, df_results_2], ["H264", "H265"], experiment, person, output_dir)
 
-#Outlier Removal
-df_results_1_filtered = outlier_removal(df_results_1)
-df_results_2_filtered = outlier_removal(df_results_2)
+    #Shapiro-Wilk Test after outlier removal 
+    # shapiro_wilk_test(df_results_1_filtered, exp1)
+    # shapiro_wilk_test(df_results_2_filtered, exp2)
 
-combined_violin_box_plot([df_results_1, df_results_2], ["H264", "H265"], experiment, person, output_dir)
 
-#Shapiro-Wilk Test after outlier removal 
-# shapiro_wilk_test(df_results_1_filtered, exp1)
-# shapiro_wilk_test(df_results_2_filtered, exp2)
+    ### **Shapiro-Wilk Normality Test (Before Outlier Removal)**
+    shapiro_test_exp1_f = stats.shapiro(df_results_1_filtered["Total Energy"])
+    shapiro_test_exp2_f = stats.shapiro(df_results_2_filtered["Total Energy"])
 
+    print(f"Shapiro-Wilk Test {exp1}: W={shapiro_test_exp1.statistic:.4f}, p-value={shapiro_test_exp1_f.pvalue:.4f}")
+    print(f"Shapiro-Wilk Test {exp2}: W={shapiro_test_exp2.statistic:.4f}, p-value={shapiro_test_exp2_f.pvalue:.4f}")
 
-### **Shapiro-Wilk Normality Test (Before Outlier Removal)**
-shapiro_test_exp1_f = stats.shapiro(df_results_1_filtered["Total Energy"])
-shapiro_test_exp2_f = stats.shapiro(df_results_2_filtered["Total Energy"])
 
-print(f"Shapiro-Wilk Test {exp1}: W={shapiro_test_exp1.statistic:.4f}, p-value={shapiro_test_exp1_f.pvalue:.4f}")
-print(f"Shapiro-Wilk Test {exp2}: W={shapiro_test_exp2.statistic:.4f}, p-value={shapiro_test_exp2_f.pvalue:.4f}")
 
+    ### **Plot Data After Outlier Removal**
+    violin_box_plot(df_results_1_filtered, f"{exp1}_filtered", person, output_dir)
+    violin_box_plot(df_results_2_filtered, f"{exp2}_filtered", person, output_dir)
 
+    combined_violin_box_plot([df_results_1_filtered, df_results_2_filtered], ["H264", "H265"], experiment+" filtered results", person, output_dir)
 
-### **Plot Data After Outlier Removal**
-violin_box_plot(df_results_1_filtered, f"{exp1}_filtered", person, output_dir)
-violin_box_plot(df_results_2_filtered, f"{exp2}_filtered", person, output_dir)
 
-combined_violin_box_plot([df_results_1_filtered, df_results_2_filtered], ["H264", "H265"], experiment+" filtered results", person, output_dir)
+    ### **Histogram of Total Energy (Before Outlier Removal)**
+    histogram_plot(df_results_1, exp1, output_dir)
+    histogram_plot(df_results_1_filtered, f"{exp1}_filtered", output_dir)
 
+    histogram_plot(df_results_2, exp2, output_dir)
+    histogram_plot(df_results_2_filtered, f"{exp2}_filtered", output_dir)
 
-### **Histogram of Total Energy (Before Outlier Removal)**
-histogram_plot(df_results_1, exp1, output_dir)
-histogram_plot(df_results_1_filtered, f"{exp1}_filtered", output_dir)
+    ### **QQ Plot to Check Normality (Before Outlier Removal)**
+    qq_plot(df_results_1, exp1, output_dir)
+    qq_plot(df_results_1_filtered, f"{exp1}_filtered", output_dir)
 
-histogram_plot(df_results_2, exp2, output_dir)
-histogram_plot(df_results_2_filtered, f"{exp2}_filtered", output_dir)
 
-### **QQ Plot to Check Normality (Before Outlier Removal)**
-qq_plot(df_results_1, exp1, output_dir)
-qq_plot(df_results_1_filtered, f"{exp1}_filtered", output_dir)
+    qq_plot(df_results_2, exp1, output_dir)
+    qq_plot(df_results_2_filtered, f"{exp2}_filtered", output_dir)
 
 
-qq_plot(df_results_2, exp1, output_dir)
-qq_plot(df_results_2_filtered, f"{exp2}_filtered", output_dir)
+    ###########################
 
 
-###########################
 
+    perform_welchs_t_test(df_results_2_filtered, df_results_1_filtered)
+    calculate_effect_size_normal(df_results_2_filtered, df_results_1_filtered)
 
 
-perform_welchs_t_test(df_results_2_filtered, df_results_1_filtered)
-calculate_effect_size_normal(df_results_2_filtered, df_results_1_filtered)
+    u_stat, p_value = perform_mann_whitney_u_test(df_results_1_filtered, df_results_2_filtered)
+    calculate_effect_size_non_normal(df_results_1_filtered, df_results_2_filtered)
 
 
-u_stat, p_value = perform_mann_whitney_u_test(df_results_1_filtered, df_results_2_filtered)
-calculate_effect_size_non_normal(df_results_1_filtered, df_results_2_filtered)
+    # ### **Measure Differences Between Samples**
+    # # Mean values
+    # mean_exp1 = np.mean(df_results_1_filtered["Total Energy"])
+    # mean_exp2 = np.mean(df_results_2_filtered["Total Energy"])
 
+    # # Mean Difference
+    # mean_diff = mean_exp1 - mean_exp2
 
-# ### **Measure Differences Between Samples**
-# # Mean values
-# mean_exp1 = np.mean(df_results_1_filtered["Total Energy"])
-# mean_exp2 = np.mean(df_results_2_filtered["Total Energy"])
+    # # Percent Change
+    # percent_change = ((mean_exp1 - mean_exp2) / mean_exp1) * 100
 
-# # Mean Difference
-# mean_diff = mean_exp1 - mean_exp2
+    # # Cohen's d
+    # std_exp1 = np.std(df_results_1_filtered["Total Energy"], ddof=1)  # Standard deviation of full dataset
+    # std_exp2 = np.std(df_results_2_filtered["Total Energy"], ddof=1)  # Standard deviation of filtered dataset
+    # pooled_std = np.sqrt((std_exp1**2 + std_exp2**2) / 2)  # Pooled standard deviation
+    # cohens_d = mean_diff / pooled_std  # Effect size
 
-# # Percent Change
-# percent_change = ((mean_exp1 - mean_exp2) / mean_exp1) * 100
+    # ### **Print the Results**
+    # print(f"\n--- Difference Metrics ---")
+    # print(f"Mean ({exp1}): {std_exp1:.4f} J")
+    # print(f"Mean ({exp2}): {std_exp2:.4f} J")
+    # print(f"Mean Difference: {mean_diff:.4f} J")
+    # print(f"Percent Change: {percent_change:.2f}%")
+    # print(f"Cohen’s d: {cohens_d:.4f} (Effect size)")
 
-# # Cohen's d
-# std_exp1 = np.std(df_results_1_filtered["Total Energy"], ddof=1)  # Standard deviation of full dataset
-# std_exp2 = np.std(df_results_2_filtered["Total Energy"], ddof=1)  # Standard deviation of filtered dataset
-# pooled_std = np.sqrt((std_exp1**2 + std_exp2**2) / 2)  # Pooled standard deviation
-# cohens_d = mean_diff / pooled_std  # Effect size
+    # # Interpretation of Cohen's d
+    # if abs(cohens_d) < 0.2:
+    #     effect_size_interpretation = "Small effect"
+    # elif abs(cohens_d) < 0.5:
+    #     effect_size_interpretation = "Medium effect"
+    # else:
+    #     effect_size_interpretation = "Large effect"
 
-# ### **Print the Results**
-# print(f"\n--- Difference Metrics ---")
-# print(f"Mean ({exp1}): {std_exp1:.4f} J")
-# print(f"Mean ({exp2}): {std_exp2:.4f} J")
-# print(f"Mean Difference: {mean_diff:.4f} J")
-# print(f"Percent Change: {percent_change:.2f}%")
-# print(f"Cohen’s d: {cohens_d:.4f} (Effect size)")
+    # print(f"Effect Size Interpretation: {effect_size_interpretation}")
 
-# # Interpretation of Cohen's d
-# if abs(cohens_d) < 0.2:
-#     effect_size_interpretation = "Small effect"
-# elif abs(cohens_d) < 0.5:
-#     effect_size_interpretation = "Medium effect"
-# else:
-#     effect_size_interpretation = "Large effect"
 
-# print(f"Effect Size Interpretation: {effect_size_interpretation}")
+if __name__ == "__main__":
+    main()
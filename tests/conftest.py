@@ -0,0 +1,28 @@
+import os, sys
+
+import numpy as np
+import pytest
+
+# The tests import the modules of the repository like main.py does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+COLUMNS = ["Delta", "Time", "CPU_FREQUENCY_0", "CPU_USAGE_0", "PACKAGE_ENERGY (J)", "TOTAL_MEMORY", "TOTAL_SWAP",
+           "USED_MEMORY", "USED_SWAP"]
+
+
+def write_trace(path, energy, interval=200, start=1.7e12):
+    """Writes a measurement CSV in the EnergiBridge layout with the given cumulative energy per sample."""
+    energy = np.asarray(energy, dtype=np.float64)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        for i, value in enumerate(energy):
+            f.write(f"{interval if i else 0},{int(start + i * interval)},2400,50.0,{value},"
+                    f"{16 << 30},{8 << 30},{4 << 30},0\n")
+    return str(path)
+
+
+@pytest.fixture
+def trace(tmp_path):
+    """Writes a measurement CSV under tmp_path: trace(name, energy, ...) -> path."""
+    return lambda name, energy, **kwargs: write_trace(os.path.join(tmp_path, name), energy, **kwargs)
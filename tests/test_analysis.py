@@ -0,0 +1,35 @@
+import numpy as np
+import scipy.stats as stats
+
+from src.analysis import compare
+
+
+def test_compare_matches_scipy_per_pair():
+    rng = np.random.default_rng(0)
+    a = np.full((3, 12), np.nan)
+    b = np.full((3, 12), np.nan)
+    for row, (n1, n2) in enumerate([(12, 12), (10, 12), (8, 9)]):
+        a[row, :n1] = rng.normal(100, 5, n1)
+        b[row, :n2] = rng.lognormal(4.6, 0.2, n2)
+
+    result = compare(a, b)
+    for row in range(3):
+        x, y = a[row][~np.isnan(a[row])], b[row][~np.isnan(b[row])]
+        welch = stats.ttest_ind(x, y, equal_var=False)
+        mann_whitney = stats.mannwhitneyu(x, y, alternative="two-sided")
+        assert result["n1"][row] == len(x) and result["n2"][row] == len(y)
+        np.testing.assert_allclose(result["welch_t"][row], welch.statistic)
+        np.testing.assert_allclose(result["welch_p"][row], welch.pvalue)
+        np.testing.assert_allclose(result["mann_whitney_u"][row], mann_whitney.statistic)
+        np.testing.assert_allclose(result["mann_whitney_p"][row], mann_whitney.pvalue)
+        np.testing.assert_allclose(result["shapiro_p1"][row], stats.shapiro(x).pvalue)
+        normal = stats.shapiro(x).pvalue >= 0.05 and stats.shapiro(y).pvalue >= 0.05
+        assert result["p_value"][row] == (welch.pvalue if normal else mann_whitney.pvalue)
+
+
+def test_compare_normality_alpha():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(0, 1, (1, 20)), rng.normal(0, 1, (1, 20))
+    # Without normality_alpha, a (spent) significance level also decides which test is used
+    assert compare(a, b, alpha=1.0, normality_alpha=0.05)["normal"][0]
+    assert not compare(a, b, alpha=1.0)["normal"][0]
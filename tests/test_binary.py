@@ -0,0 +1,64 @@
+import json, argparse
+
+import numpy as np
+import pandas as pd
+
+from src.binary import RingBuffer, BinaryWriter, read_binary, to_csv
+from src.energiBridge import EnergiBridge, Task
+from src.experiment import Experiment
+from src.samplers import SyntheticSampler
+
+
+def test_ring_buffer_spills_when_full():
+    spilled = []
+    buffer = RingBuffer(["Time", "PACKAGE_ENERGY (J)"], capacity=4, spill=spilled.append)
+    for i in range(10):
+        buffer.append((i, i * 1.5))
+    assert [list(rows["Time"]) for rows in spilled] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert list(buffer.drain()["Time"]) == [8, 9]
+    assert len(buffer) == 0
+
+
+def test_ring_buffer_overwrites_without_spill():
+    buffer = RingBuffer(["Time"], capacity=3)
+    for i in range(5):
+        buffer.append((i,))
+    assert list(buffer.drain()["Time"]) == [2, 3, 4]
+
+
+def test_binary_round_trip(tmp_path, trace):
+    source = trace("1.csv", [10, 12, 14, 16, 18])
+    sampler = SyntheticSampler(source)
+    path = str(tmp_path / "1.ebin")
+    # A capacity below the number of samples, so the file is written in several spills
+    writer = BinaryWriter(path, sampler.columns(), interval=200, capacity=2)
+    for i in range(5):
+        writer.append(200 if i else 0, 1000 + 200 * i, sampler.read())
+    writer.close()
+
+    header, rows = read_binary(path)
+    assert len(rows) == 5
+    assert "TOTAL_MEMORY" not in header["stored"] and header["static"]["TOTAL_MEMORY"] == 16 << 30
+
+    expected = pd.read_csv(source)
+    data = pd.read_csv(to_csv(path, str(tmp_path / "1.csv.out")))
+    assert list(data.columns) == list(expected.columns)
+    np.testing.assert_array_equal(data["Delta"], [0, 200, 200, 200, 200])
+    for column in expected.columns[2:]:
+        np.testing.assert_allclose(data[column], expected[column])
+
+
+def test_missing_workload_is_a_failed_run(tmp_path, monkeypatch, trace):
+    # EnergiBridge resolves the log file relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    experiment = Experiment.from_config("missing", {"name": "missing", "enabled": True,
+                                                    "linux-cmd": ["/nonexistent/workload"],
+                                                    "windows-cmd": ["C:/nonexistent/workload.exe"]}, "x")
+    settings = argparse.Namespace(interval=200, output="results", sampler="synthetic", in_process=True,
+                                  trace=trace("1.csv", [10, 12, 14]), live=False, metrics=None)
+    task = Task(1, experiment, settings)
+    EnergiBridge(settings).run(task)
+    with open(task.info_output_path) as f:
+        assert "error" in json.load(f)
+    with open(task.log_output_path) as f:
+        assert "Could not start the workload" in f.read()
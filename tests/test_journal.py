@@ -0,0 +1,50 @@
+import os, sys, json, argparse
+
+from src.experiment import Experiment
+from src.journal import Journal
+from src.runner import journaled_tasks
+
+
+def make_settings(output):
+    return argparse.Namespace(iterations=3, warmup=0, interleave="shuffle", output=str(output), interval=200)
+
+
+def experiments():
+    return [Experiment.from_config(name, {"name": name, "enabled": True, "linux-cmd": [sys.executable, "-V"],
+                                          "windows-cmd": [sys.executable, "-V"]}, "x")
+            for name in ["a", "b"]]
+
+
+def complete(task):
+    # The files a finished run leaves behind
+    os.makedirs(os.path.dirname(task.measurements_output_path), exist_ok=True)
+    with open(task.measurements_output_path, "w") as f:
+        f.write("Delta,Time\n0,1\n")
+    os.makedirs(os.path.dirname(task.info_output_path), exist_ok=True)
+    with open(task.info_output_path, "w") as f:
+        json.dump({"endingTime": "now"}, f)
+
+
+def test_resume_skips_completed_tasks(tmp_path):
+    settings = make_settings(tmp_path / "group")
+    journal = Journal(str(tmp_path))
+    planned = journaled_tasks(experiments(), settings, journal)
+    group = journal.group(settings.output)
+    for task in planned[:2]:
+        complete(task)
+        journal.record_done(group, task.id)
+    # Recorded as done, but its measurements were lost
+    journal.record_done(group, planned[2].id)
+    with open(journal.path, "a") as f:
+        f.write('{"type": "done", "gro')
+
+    resumed = journaled_tasks(experiments(), settings, Journal(str(tmp_path)))
+    assert [(t.id, t.experiment.name) for t in resumed] == [(t.id, t.experiment.name) for t in planned[2:]]
+
+
+def test_plan_is_replayed(tmp_path):
+    settings = make_settings(tmp_path / "group")
+    journal = Journal(str(tmp_path))
+    planned = journaled_tasks(experiments(), settings, journal)
+    _, tasks = Journal(str(tmp_path)).plan(journal.group(settings.output))
+    assert tasks == [(t.id, t.experiment.name) for t in planned]
@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.measurements import correct_deltas, integrate_energy, summarize_run, summarize_energy
+
+
+def test_correct_deltas_without_negative_steps():
+    np.testing.assert_array_equal(correct_deltas([1.0, 2.0, 3.0]), [1.0, 2.0, 3.0])
+
+
+def test_correct_deltas_wrap():
+    np.testing.assert_allclose(correct_deltas([5.0, -95.0, 5.0], wrap=100), [5.0, 5.0, 5.0])
+
+
+def test_correct_deltas_uses_median_power():
+    # The broken step is twice as long as the others, so twice their median energy is assumed
+    np.testing.assert_allclose(correct_deltas([2.0, -50.0, 2.0, 4.0], [200, 400, 200, 200]), [2.0, 4.0, 2.0, 4.0])
+
+
+def test_correct_deltas_padded_matrix():
+    deltas = np.array([[1.0, -9.0, 1.0], [3.0, -9.0, np.nan]])
+    np.testing.assert_allclose(correct_deltas(deltas), [[1.0, 1.0, 1.0], [3.0, 3.0, np.nan]])
+
+
+def test_integrate_energy_reset():
+    assert integrate_energy([10, 12, 1, 3]) == 6.0
+
+
+def test_summarize_energy(trace):
+    path = trace("1.csv", [10, 12, 14, 16])
+    summary = summarize_energy(path)
+    assert summary["total_energy"] == 6.0
+    assert summary["duration"] == 0.6
+
+
+def test_summarize_energy_reset_above_start(trace):
+    # Last minus first is positive, but the counter was reset in between
+    path = trace("1.csv", [10, 20, 30, 5, 15, 25])
+    assert summarize_energy(path)["total_energy"] == summarize_run(path)["total_energy"] == 50.0
@@ -0,0 +1,43 @@
+import math
+
+import numpy as np
+
+from src import resampling
+from src.resampling import bootstrap, permutation_test
+
+
+def test_exact_permutation_test():
+    a, b = [1.0, 2.0, 3.0], [4.0, 5.0, 6.0]
+    p, exact = permutation_test(a, b)
+    assert exact
+    # Only the observed split and its mirror image are as extreme, out of all 20 splits
+    assert p == 2 / math.comb(6, 3)
+
+
+def test_monte_carlo_permutation_test(monkeypatch):
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(0, 1, 12), rng.normal(3, 1, 12)
+    monkeypatch.setattr(resampling, "MAX_EXACT", math.comb(24, 12) - 1)
+    p, exact = permutation_test(a, b, resamples=999, seed=1)
+    assert not exact
+    # Never below 1 / (resamples + 1), and the same for the same seed
+    assert p == 1 / 1000
+    assert permutation_test(a, b, resamples=999, seed=1) == (p, False)
+
+
+def test_monte_carlo_agrees_with_exact(monkeypatch):
+    rng = np.random.default_rng(2)
+    a, b = rng.normal(0, 1, 6), rng.normal(0.5, 1, 6)
+    exact, _ = permutation_test(a, b)
+    monkeypatch.setattr(resampling, "MAX_EXACT", 0)
+    sampled, _ = permutation_test(a, b, resamples=20000, seed=0)
+    assert abs(exact - sampled) < 0.02
+
+
+def test_bootstrap_does_not_depend_on_workers():
+    rng = np.random.default_rng(3)
+    a, b = rng.normal(10, 1, 15), rng.normal(11, 1, 15)
+    serial = bootstrap(a, b, resamples=3000, seed=4, chunksize=1000)
+    assert serial == bootstrap(a, b, resamples=3000, seed=4, chunksize=1000, workers=2)
+    estimate, low, high = serial["mean_diff"]
+    assert low < estimate < high
@@ -0,0 +1,24 @@
+import sys
+
+import pandas as pd
+
+from src.measurements import summarize_run
+from src.samplers import SyntheticSampler, record
+
+
+def test_synthetic_sampler_replays_trace(trace):
+    sampler = SyntheticSampler(trace("1.csv", [10, 12, 1, 3]))
+    assert sampler.columns()[:2] == ["Delta", "Time"]
+    energy = sampler.columns().index("PACKAGE_ENERGY (J)") - 2
+    # The reset step is dropped, and the counter keeps increasing when the trace is cycled
+    assert [sampler.read()[energy] for _ in range(6)] == [10, 12, 12, 14, 14, 16]
+
+
+def test_record_writes_energibridge_layout(tmp_path, trace):
+    sampler = SyntheticSampler(trace("1.csv", [10, 12, 14, 16]))
+    output = str(tmp_path / "out.csv")
+    assert record(sampler, [sys.executable, "-c", "import time; time.sleep(0.3)"], output, interval=50) == 0
+    data = pd.read_csv(output)
+    assert list(data.columns) == sampler.columns()
+    assert len(data) >= 2 and data["Delta"].iloc[0] == 0
+    assert summarize_run(output)["total_energy"] > 0
@@ -0,0 +1,31 @@
+import os, json
+
+import pandas as pd
+
+from src.session import split_session
+
+
+def test_split_session(tmp_path, trace):
+    # Samples every 200 ms from 1000 ms on
+    session = trace("session.csv", [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], start=1000)
+    markers = str(tmp_path / "session.markers.jsonl")
+    runs = [(1, 1300, 1700), (2, 1800, 2000)]
+    with open(markers, "w") as f:
+        for id, start, end in runs:
+            f.write(json.dumps({"id": id, "experiment": "e", "start": start, "end": end,
+                                "measurements": str(tmp_path / "measurements" / f"{id}.csv"),
+                                "info": str(tmp_path / "info" / f"{id}.json"), "data": {"taskCmd": "x"}}) + "\n")
+        # A marker cut off by a crash is skipped
+        f.write('{"id": 3, "exp')
+
+    assert split_session(session, markers) == [1, 2]
+    first = pd.read_csv(tmp_path / "measurements" / "1.csv")
+    # From the last sample at or before the start to the first one at or after the end
+    assert list(first["Time"]) == [1200, 1400, 1600, 1800]
+    assert first["Delta"].iloc[0] == 0
+    second = pd.read_csv(tmp_path / "measurements" / "2.csv")
+    assert list(second["Time"]) == [1800, 2000]
+    with open(tmp_path / "info" / "1.json") as f:
+        info = json.load(f)
+    assert info["taskCmd"] == "x" and info["session"] == {"trace": session, "rows": [1, 4]}
+    assert not os.path.exists(tmp_path / "measurements" / "3.csv")
@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.measurements import summarize_run
+from src.store import ingest_experiment, Partition
+
+
+@pytest.fixture
+def store(tmp_path, trace):
+    measurements = os.path.join(tmp_path, "final_results", "p", "480p", "decode_480p_h264", "measurements")
+    trace(os.path.join(measurements, "1.csv"), [10, 12, 14, 16])
+    # A reset after the second sample
+    trace(os.path.join(measurements, "2.csv"), [10, 12, 1, 3, 5])
+    # A single sample has no energy and is left out
+    trace(os.path.join(measurements, "3.csv"), [10])
+    ingest_experiment(measurements, os.path.join(tmp_path, "store", "p", "480p", "decode_480p_h264"))
+    return os.path.join(tmp_path, "store"), measurements
+
+
+def test_energy_steps(store):
+    partition = Partition(store[0], "p", "480p", "decode_480p_h264")
+    assert partition.runs == ["1", "2"]
+    assert partition.energy_column() == "PACKAGE_ENERGY (J)"
+    # The last step of every run is zero, the reset is bridged with the median step of its run
+    np.testing.assert_allclose(partition.energy_steps(), [2, 2, 2, 0, 2, 2, 2, 2, 0])
+    np.testing.assert_allclose(partition.total_energy(), [6, 8])
+
+
+def test_total_energy_matches_csv(store):
+    partition = Partition(store[0], "p", "480p", "decode_480p_h264")
+    expected = [summarize_run(os.path.join(store[1], f"{run}.csv"))["total_energy"] for run in partition.runs]
+    np.testing.assert_allclose(partition.total_energy(), expected)
+    np.testing.assert_allclose(partition.total_energy(runs=[2]), expected[1:])
+
+
+def test_stale_partition_is_ingested_again(store, trace):
+    trace(os.path.join(store[1], "4.csv"), [0, 5, 10])
+    partition = Partition(store[0], "p", "480p", "decode_480p_h264")
+    assert partition.runs == ["1", "2", "4"]
+    np.testing.assert_allclose(partition.total_energy(runs=[4]), [10])